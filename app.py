@@ -8,28 +8,49 @@ Enhanced with sentiment analysis, entity recognition, and context management
 """
 
 import os
+import hashlib
 import json
 import logging
+import secrets
+import threading
 import time
 import re
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait as wait_futures
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+from itertools import islice
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Any
+from functools import lru_cache
 
-import numpy as np
-from flask import Flask, request, jsonify, render_template, session
+import ahocorasick
+import httpx
+from cachetools import TTLCache
+import orjson
+from flask import Flask, Response, request, render_template, session, stream_with_context
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import openai
-from dotenv import load_dotenv
+from dotenv import find_dotenv, load_dotenv
 
-# Load environment variables
-load_dotenv()
+try:
+    import redis
+except ImportError:  # Responses are cached in-process only
+    redis = None  # type: ignore[assignment]
+
+try:
+    import re2 as re_engine  # Linear-time matching for user-supplied text
+except ImportError:  # Entity extraction falls back to the backtracking stdlib engine
+    re_engine = re
+
+# Load environment variables from the .env in (or above) the working directory. The
+# default frame-based search finds nothing when app.py is compiled with mypyc
+load_dotenv(find_dotenv(usecwd=True))
 
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
@@ -39,33 +60,221 @@ app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
 CORS(app)
 
-# Rate limiting
-limiter = Limiter(
-    app=app,
-    key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"]
-)
+def ojsonify(obj: Any) -> Response:
+    """jsonify() replacement that serializes with orjson"""
+    return app.response_class(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY), mimetype='application/json')
 
 # Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
 MAX_TOKENS = int(os.getenv('MAX_TOKENS', '150'))
 TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '10'))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+NLP_CACHE_SIZE = 2048  # Memoized results per NLP processor
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '5000'))
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '3600'))  # seconds
+RESPONSE_CACHE_VERSION = 'v1'  # Bump when intent or response logic changes to drop cached answers
+REDIS_URL = os.getenv('REDIS_URL')
+CHAT_WORKERS = int(os.getenv('CHAT_WORKERS', '32'))  # Threads running chat requests
+CHAT_TIMEOUT = float(os.getenv('CHAT_TIMEOUT', '25'))  # seconds
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '10'))  # Messages per /api/chat/batch request
 
 # Initialize OpenAI client
+client: Optional[openai.OpenAI] = None
 if OPENAI_API_KEY and OPENAI_API_KEY != "your_openai_api_key_here":
     try:
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        # Persistent HTTP/2 connection pool so requests reuse TCP/TLS connections
+        http_client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=3.0)
+        )
+        client = openai.OpenAI(
+            api_key=OPENAI_API_KEY,
+            http_client=http_client,
+            timeout=OPENAI_TIMEOUT,
+            max_retries=OPENAI_MAX_RETRIES
+        )
         logger.info("OpenAI client initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing OpenAI client: {e}")
-        client = None
 else:
     logger.warning("OpenAI API key not found or not configured. Some features may be limited.")
-    client = None
 
-@dataclass
-class Entity:
+# Initialize Redis response cache, shared across workers
+redis_pool: Optional[Any] = None
+redis_client: Optional[Any] = None
+if REDIS_URL and redis is not None:
+    try:
+        redis_pool = redis.ConnectionPool.from_url(REDIS_URL, socket_connect_timeout=1.0, socket_timeout=1.0)
+        redis_client = redis.Redis(connection_pool=redis_pool)
+        logger.info("Redis response cache configured")
+    except Exception as e:
+        logger.error(f"Error initializing Redis client: {e}")
+
+# Rate limiting; counters live in Redis when available so all workers share them
+limiter = Limiter(
+    app=app,
+    key_func=get_remote_address,
+    default_limits=["200 per day", "50 per hour"],
+    storage_uri=REDIS_URL if redis_pool is not None else "memory://",
+    storage_options={"connection_pool": redis_pool} if redis_pool is not None else {},
+    strategy="fixed-window",
+    in_memory_fallback_enabled=True  # Per-worker limits while Redis is unreachable
+)
+
+# Static parts of the OpenAI system prompt
+SYSTEM_PROMPT_HEADER = "You are a professional, helpful customer support AI assistant."
+SYSTEM_PROMPT_GUIDELINES = """CRITICAL GUIDELINES:
+- ALWAYS address the user's specific intent first - don't give generic responses
+- If intent is "return_refund" or mentions damage/defects, focus on helping with returns/refunds
+- If intent is "technical_support", focus on troubleshooting and technical assistance
+- If intent is "billing", focus on payment and account issues
+- If intent is "product_info", provide specific product details, not generic help
+- Keep responses concise and professional (under 150 words)
+- If sentiment is negative, be extra empathetic and helpful
+- Always ask for specific details needed to help (order numbers, account info, etc.)
+- Offer to escalate to human support if needed
+- Be conversational but professional
+- NEVER give generic "how can I help" responses when user has a specific issue"""
+
+def format_timestamp(timestamp: float) -> str:
+    """Convert a stored time.time() value to an ISO 8601 string"""
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+@lru_cache(maxsize=1)
+def _format_second(second: int) -> str:
+    return datetime.fromtimestamp(second).isoformat()
+
+def current_timestamp() -> str:
+    """Current time as an ISO 8601 string, to the second; built at most once per second"""
+    return _format_second(int(time.time()))
+
+# Entity patterns for customer support, combined into one regex in AdvancedNLPProcessor.
+# Patterns must only use non-capturing groups; earlier entries win overlapping matches.
+ENTITY_PATTERNS = {
+    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'phone': r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
+    'order_number': r'\b[A-Z]{2,3}\d{6,8}\b',
+    'account_number': r'\b\d{8,12}\b',
+    'url': r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?',
+    'product_name': r'\b(?:product|service|item|subscription|plan)\s+(?:[A-Za-z0-9\s]+)',
+    'error_code': r'\b(?:error|error code|code)\s*[A-Z0-9]{3,8}\b',
+    'version_number': r'\bv?\d+\.\d+(?:\.\d+)?\b'
+}
+
+# Text preprocessing patterns
+_WS_RE = re.compile(r'\s+')
+_ABBREVIATIONS = {'pls': 'please', 'plz': 'please', 'thx': 'thanks', 'tnx': 'thanks', 'u': 'you', 'ur': 'you'}
+_ABBREVIATION_RE = re.compile(r'\b(' + '|'.join(_ABBREVIATIONS) + r')\b', re.IGNORECASE)
+
+# Word tokens for keyword matching
+_TOKEN_RE = re.compile(r'\w+')
+
+# Inflected forms matched alongside each keyword, shared by the intent groups and the
+# fallback keyword sets below. Keywords match whole words, so plurals and past tenses
+# that a substring test would catch have to be listed
+KEYWORD_INFLECTIONS = {
+    'return': ('returns', 'returned', 'returning'),
+    'refund': ('refunds', 'refunded'),
+    'exchange': ('exchanges', 'exchanged'),
+    'replace': ('replaced', 'replacement', 'replacements'),
+    'swap': ('swaps', 'swapped'),
+    'error': ('errors',),
+    'bug': ('bugs',),
+    'problem': ('problems',),
+    'issue': ('issues',),
+    'crash': ('crashes', 'crashed', 'crashing'),
+    'failure': ('failures',),
+    'exception': ('exceptions',),
+    'lag': ('lags', 'lagging'),
+    'freeze': ('freezes',),
+    'hang': ('hangs', 'hanging'),
+    'bill': ('bills', 'billed', 'billing'),
+    'payment': ('payments',),
+    'charge': ('charges', 'charged', 'overcharge', 'overcharges', 'overcharged'),
+    'cost': ('costs',),
+    'price': ('prices',),
+    'subscription': ('subscriptions',),
+    'invoice': ('invoices',),
+    'receipt': ('receipts',),
+    'account': ('accounts',),
+    'damage': ('damages',),
+    'product': ('products',),
+    'feature': ('features',),
+    'specification': ('specifications',),
+    'guide': ('guides',),
+    'tutorial': ('tutorials',),
+    'manual': ('manuals',),
+    'complaint': ('complaints',),
+    'suggest': ('suggests', 'suggested', 'suggestion', 'suggestions'),
+    'improve': ('improves', 'improved', 'improvement', 'improvements'),
+    'idea': ('ideas',),
+    'recommendation': ('recommendations',),
+    'opinion': ('opinions',),
+    'thought': ('thoughts',),
+    'review': ('reviews',),
+    'rating': ('ratings',),
+    'comment': ('comments',),
+    'profile': ('profiles',),
+    'password': ('passwords',),
+    'login': ('logins',),
+    'question': ('questions',),
+    'ask': ('asks', 'asked', 'asking'),
+    'thank': ('thanks', 'thanked', 'thankful'),
+}
+
+def with_inflections(keywords: Iterable[str]) -> List[str]:
+    """Keywords followed by their KEYWORD_INFLECTIONS, without duplicates"""
+    expanded: Dict[str, None] = {}
+    for keyword in keywords:
+        expanded[keyword] = None
+        for form in KEYWORD_INFLECTIONS.get(keyword, ()):
+            expanded[form] = None
+    return list(expanded)
+
+# Intent keywords in priority order; the first group with a whole-word match wins
+INTENT_KEYWORDS = [
+    # Return/Refund keywords
+    ("return_refund", ['return', 'refund', 'exchange', 'wrong item', 'wrong color', 'wrong size', 'not what i ordered', 'send back', 'ship back', 'replace', 'swap', 'exchange', 'return policy', 'refund policy']),
+    # Technical support keywords
+    ("technical_support", ['error', 'bug', 'problem', 'issue', 'crash', 'broken', 'not working', 'failed', 'failure', 'exception', 'timeout', 'slow', 'performance', 'lag', 'freeze', 'hang', 'unresponsive']),
+    # Billing keywords
+    ("billing", ['bill', 'payment', 'charge', 'cost', 'price', 'subscription', 'refund', 'invoice', 'receipt', 'billing', 'account', 'credit', 'debit', 'overcharge', 'double charge']),
+    # Damage/complaint words rank above product info to avoid misclassification
+    ("return_refund", ['damaged', 'broken', 'defective', 'faulty', 'not working', 'problem', 'issue', 'damage', 'destroyed', 'torn', 'ripped', 'scratched', 'cracked']),
+    # Product information keywords
+    ("product_info", ['product', 'feature', 'specification', 'what is', 'how to', 'guide', 'tutorial', 'manual', 'documentation', 'capabilities', 'functionality', 'benefits', 'comparison']),
+    # Complaint keywords
+    ("complaint", ['complaint', 'unhappy', 'dissatisfied', 'angry', 'frustrated', 'bad', 'terrible', 'awful', 'horrible', 'disappointed', 'upset', 'annoyed', 'irritated']),
+    # Feedback keywords
+    ("feedback", ['feedback', 'suggest', 'improve', 'idea', 'recommendation', 'suggestion', 'opinion', 'thought', 'review', 'rating', 'comment']),
+    # Account management keywords
+    ("account_management", ['account', 'profile', 'settings', 'preferences', 'password', 'login', 'signin', 'signup', 'register', 'create account', 'delete account']),
+    # General inquiry keywords (lowest priority)
+    ("general_inquiry", ['hello', 'hi', 'help', 'support', 'question', 'info', 'information', 'assist', 'assistance', 'guide', 'how', 'what', 'when', 'where', 'why']),
+]
+
+def _compile_phrases(phrases: List[str]) -> Optional["re.Pattern[str]"]:
+    """One whole-word alternation over a group's multi-word phrases"""
+    if not phrases:
+        return None
+    return re.compile(r'\b(?:' + '|'.join(map(re.escape, phrases)) + r')\b')
+
+# Split each group into whole-word keywords and a compiled phrase pattern
+INTENT_MATCHERS = [
+    (
+        intent_name,
+        frozenset(with_inflections(keyword for keyword in keywords if ' ' not in keyword)),
+        _compile_phrases([keyword for keyword in keywords if ' ' in keyword])
+    )
+    for intent_name, keywords in INTENT_KEYWORDS
+]
+
+SENTIMENT_CLASSES = ('positive', 'negative', 'neutral')
+
+class Entity(NamedTuple):
     """Represents an extracted entity from user input"""
     text: str
     type: str
@@ -73,64 +282,97 @@ class Entity:
     start_pos: int
     end_pos: int
 
-@dataclass
-class SentimentAnalysis:
+class SentimentAnalysis(NamedTuple):
     """Represents sentiment analysis results"""
     sentiment: str  # positive, negative, neutral
     confidence: float
     emotions: Dict[str, float]
 
+class MessageAnalysis(NamedTuple):
+    """NLP results for one preprocessed message"""
+    processed_message: str
+    entities: Tuple[Entity, ...]
+    sentiment: SentimentAnalysis
+    intent: str
+
 class AdvancedNLPProcessor:
     """Advanced NLP processing with entity recognition and sentiment analysis"""
     
     def __init__(self):
-        # Common entities for customer support
-        self.entity_patterns = {
-            'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            'phone': r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
-            'order_number': r'\b[A-Z]{2,3}\d{6,8}\b',
-            'account_number': r'\b\d{8,12}\b',
-            'url': r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?',
-            'product_name': r'\b(?:product|service|item|subscription|plan)\s+([A-Za-z0-9\s]+)',
-            'error_code': r'\b(?:error|error code|code)\s*[A-Z0-9]{3,8}\b',
-            'version_number': r'\bv?\d+\.\d+(?:\.\d+)?\b'
-        }
+        # Common entities for customer support, matched in a single case-insensitive pass
+        self.entity_pattern = re_engine.compile(
+            '(?i)' + '|'.join(f'(?P<{entity_type}>{pattern})' for entity_type, pattern in ENTITY_PATTERNS.items())
+        )
         
-        # Sentiment keywords
+        # Sentiment keywords (frozensets for O(1) membership per word)
         self.sentiment_keywords = {
-            'positive': ['great', 'excellent', 'amazing', 'love', 'perfect', 'wonderful', 'fantastic', 'awesome', 'good', 'helpful'],
-            'negative': ['terrible', 'awful', 'horrible', 'hate', 'worst', 'disappointed', 'frustrated', 'angry', 'bad', 'poor'],
-            'neutral': ['okay', 'fine', 'alright', 'normal', 'standard', 'usual', 'regular']
+            'positive': frozenset(['great', 'excellent', 'amazing', 'love', 'perfect', 'wonderful', 'fantastic', 'awesome', 'good', 'helpful']),
+            'negative': frozenset(['terrible', 'awful', 'horrible', 'hate', 'worst', 'disappointed', 'frustrated', 'angry', 'bad', 'poor']),
+            'neutral': frozenset(['okay', 'fine', 'alright', 'normal', 'standard', 'usual', 'regular'])
         }
+        
+        # Keyword class ids used to integer-encode batches; the vocabulary is built on first use
+        self._sentiment_kw_class = {
+            word: class_id
+            for class_id, sentiment in enumerate(SENTIMENT_CLASSES)
+            for word in self.sentiment_keywords[sentiment]
+        }
+        self._sentiment_vocab = None
+        
+        # Memoize per-text results; repeated messages skip the regex and keyword work
+        # (cached wrappers are separate attributes so the class stays compilable by mypyc)
+        self._entities_cache = lru_cache(maxsize=NLP_CACHE_SIZE)(self._extract_entities)
+        self._sentiment_cache = lru_cache(maxsize=NLP_CACHE_SIZE)(self._analyze_sentiment)
     
-    def extract_entities(self, text: str) -> List[Entity]:
+    def extract_entities(self, text: str) -> Tuple[Entity, ...]:
         """Extract entities from text using pattern matching"""
-        entities = []
-        
-        for entity_type, pattern in self.entity_patterns.items():
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entity = Entity(
-                    text=match.group(),
-                    type=entity_type,
-                    confidence=0.8,  # Pattern-based confidence
-                    start_pos=match.start(),
-                    end_pos=match.end()
-                )
-                entities.append(entity)
-        
-        return entities
+        return self._entities_cache(text)
     
     def analyze_sentiment(self, text: str) -> SentimentAnalysis:
         """Analyze sentiment using keyword-based approach"""
+        return self._sentiment_cache(text)
+    
+    def _extract_entities(self, text: str) -> Tuple[Entity, ...]:
+        # Tuple of tuples so cached results can be shared safely; 0.8 is the pattern-based confidence
+        return tuple(
+            Entity(match.group(), match.lastgroup, 0.8, match.start(), match.end())
+            for match in self.entity_pattern.finditer(text)
+        )
+    
+    def _analyze_sentiment(self, text: str) -> SentimentAnalysis:
         text_lower = text.lower()
         words = text_lower.split()
         
-        positive_score = sum(1 for word in words if word in self.sentiment_keywords['positive'])
-        negative_score = sum(1 for word in words if word in self.sentiment_keywords['negative'])
-        neutral_score = sum(1 for word in words if word in self.sentiment_keywords['neutral'])
+        positive_words = self.sentiment_keywords['positive']
+        negative_words = self.sentiment_keywords['negative']
+        neutral_words = self.sentiment_keywords['neutral']
+        
+        positive_score = sum(1 for word in words if word in positive_words)
+        negative_score = sum(1 for word in words if word in negative_words)
+        neutral_score = sum(1 for word in words if word in neutral_words)
+        
+        return self._score_sentiment(positive_score, negative_score, neutral_score, len(words))
+    
+    def analyze_sentiment_batch(self, texts: List[str]) -> List[SentimentAnalysis]:
+        """Analyze sentiment for many texts at once with vectorized keyword lookup"""
+        # Imported here so NumPy and numba load only when batches are used
+        from nlp_kernels import SortedVocabulary, count_classes, pack_tokens
+        
+        if self._sentiment_vocab is None:
+            self._sentiment_vocab = SortedVocabulary(self._sentiment_kw_class)
+        
+        word_lists = [text.lower().split() for text in texts]
+        words, lengths, offsets = pack_tokens(word_lists)
+        class_ids = self._sentiment_vocab.lookup(words, -1)
+        counts = count_classes(class_ids, lengths, offsets, len(SENTIMENT_CLASSES))
         
-        total_words = len(words)
+        return [
+            self._score_sentiment(int(pos), int(neg), int(neu), len(words))
+            for (pos, neg, neu), words in zip(counts, word_lists)
+        ]
+    
+    def _score_sentiment(self, positive_score: int, negative_score: int, neutral_score: int, total_words: int) -> SentimentAnalysis:
+        """Turn per-class keyword counts into a SentimentAnalysis"""
         if total_words == 0:
             return SentimentAnalysis('neutral', 0.5, {})
         
@@ -158,84 +400,291 @@ class AdvancedNLPProcessor:
         
         return SentimentAnalysis(sentiment, confidence, emotions)
 
+# Fallback response keywords and phrases, matched as whole words; inflections
+# come from KEYWORD_INFLECTIONS, as for INTENT_KEYWORDS
+_ORDER_NUMBER_RE = re.compile(r'^\d{10,20}$')
+
+_DAMAGE_DESCRIPTION_KWS = frozenset({'broken', 'damaged', 'cracked', 'torn', 'scratched', 'defective'})
+_REPLACEMENT_KWS = frozenset(with_inflections(['replacement', 'replace', 'new', 'exchange']))
+_REFUND_KWS = frozenset(with_inflections(['refund', 'return']))
+_THANKS_KWS = frozenset(with_inflections(['thank you', 'thank', 'appreciate it', 'great', 'perfect']))
+_GREETING_KWS = frozenset({'hi', 'hello'})
+_TECH_KWS = frozenset(with_inflections(['app', 'crash', 'not working', 'error', 'bug', 'problem']))
+_CRASH_KWS = frozenset(with_inflections(['crash']))
+_BILL_KWS = frozenset(with_inflections(['bill']))
+_PAYMENT_KWS = frozenset(with_inflections(['payment']))
+_BILLING_KWS = _BILL_KWS | _PAYMENT_KWS | frozenset(with_inflections(['charge', 'cost', 'price']))
+_DAMAGE_KWS = frozenset({'damaged', 'broken', 'defective', 'faulty', 'destroyed', 'torn', 'ripped', 'scratched', 'cracked'})
+_RETURN_KWS = frozenset(with_inflections(['return', 'refund', 'exchange', 'wrong']))
+_PRODUCT_KWS = frozenset(with_inflections(['product', 'feature', 'what is', 'how to']))
+_PRODUCT_SKIP_KWS = frozenset(with_inflections(['damaged', 'broken', 'defective', 'faulty', 'return', 'refund', 'exchange']))
+_ACCOUNT_KWS = frozenset(with_inflections(['account', 'password', 'login', 'signin', 'signup']))
+_PAST_ORDER_KWS = frozenset({'past order', 'previous order', 'order history'})
+_QUESTION_KWS = frozenset(with_inflections(['question', 'ask']))
+_COMPLAINT_KWS = frozenset(with_inflections(['complaint', 'unhappy', 'dissatisfied', 'angry', 'frustrated']))
+_FEEDBACK_KWS = frozenset(with_inflections(['feedback', 'suggest', 'improve', 'idea']))
+
+# Phrases looked for in the previous assistant message to detect follow-ups
+_ASKED_ORDER_NUMBER_PHRASES = ("order number", "what's your order number", "please provide your order number")
+_ASKED_DAMAGE_PHRASES = ("describe the damage", "damage you see", "description of the damage")
+_ASKED_PREFERENCE_PHRASES = ("replacement or refund", "prefer a replacement", "refund or exchange", "replacement/refund", "would you prefer", "prefer a")
+_PROCESSING_PHRASES = ("processing your", "request has been submitted", "confirmation email", "return label")
+_RESOLVED_PHRASES = ("processed your", "shipped to you", "tracking information", "refund will be processed")
+
+def _is_word_char(char: str) -> bool:
+    """Match the regex notion of a word character (\\w)"""
+    return char.isalnum() or char == '_'
+
+def _thanks_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Thank-you messages"""
+    # Check if this is after a successful resolution
+    if any(phrase in last_ai_response for phrase in _RESOLVED_PHRASES):
+        return "You're very welcome! I'm glad I could help resolve your issue. Your request has been successfully processed and you'll receive all the necessary information via email.\n\nIf you need any further assistance in the future, don't hesitate to reach out. Have a great day! 😊"
+    return "You're welcome! I'm here to help. Is there anything else I can assist you with today?"
+
+def _greeting_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Greeting, optionally mentioning a specific issue"""
+    if 'shirt' in tokens or 'size' in tokens:
+        return "Hello! I see you mentioned a shirt size issue. Let me help you with that specifically. What size did you order and what size did you receive? I'll get this sorted out right away."
+    elif 'problem' in tokens or 'issue' in tokens:
+        return "Hello! I understand you're experiencing a problem. Let me help you resolve it. Can you tell me more about what's happening?"
+    else:
+        return "Hello! I'm here to help you with any questions or concerns. How can I assist you today?"
+
+def _shirt_size_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Shirt size issues"""
+    if 'size' not in tokens:
+        return None
+    if 'small' in tokens:
+        return "I see you're having an issue with a small shirt size. Let me help you get the right size:\n\n1. What size did you actually order?\n2. What size did you receive?\n3. What's your order number?\n\nI can help you get the correct size or process an exchange immediately."
+    elif 'big' in tokens or 'large' in tokens:
+        return "I understand the shirt you received is too big. Let me help you get the right size:\n\n1. What size did you order?\n2. What size did you receive?\n3. What's your order number?\n\nI'll process a size exchange for you right away."
+    else:
+        return "I see you're having a shirt sizing issue. To help you quickly, I need:\n\n1. Your order number\n2. What size you ordered vs. received\n3. Whether you want an exchange or refund\n\nWhat's your order number?"
+
+def _technical_support_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Technical support (app crashes, errors, things not working)"""
+    if 'app' in tokens and tokens & _CRASH_KWS:
+        return "I understand your app is crashing. Let me help troubleshoot this specific issue:\n\n1. What device are you using? (iOS/Android/Desktop)\n2. What's your app version?\n3. What were you doing when it crashed?\n4. Does this happen every time?\n\nThis will help me provide the right solution or escalate to our technical team."
+    elif 'not working' in message_lower:
+        return "I see something isn't working for you. To help fix this quickly, I need to know:\n\n1. What exactly isn't working?\n2. What were you trying to do?\n3. What error messages do you see?\n4. When did this start happening?\n\nLet me get this resolved for you right away."
+    else:
+        return "I understand you're experiencing a technical issue. Our support team will help you resolve this. Please provide:\n\n1. What specific problem you're facing\n2. Any error messages you see\n3. What you were doing when it happened\n\nI'll make sure this gets resolved quickly."
+
+def _billing_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Billing and payment questions"""
+    if tokens & _BILL_KWS:
+        return "I can help with your billing question. To assist you effectively, I need:\n\n1. Your account number or email\n2. What specific billing issue you're experiencing\n3. When this occurred\n\nI'll look into this right away and get it resolved for you."
+    elif tokens & _PAYMENT_KWS:
+        return "I understand you have a payment question. Let me help you with that:\n\n1. What payment method are you using?\n2. What specific payment issue are you facing?\n3. When did this happen?\n\nI'll get this sorted out for you immediately."
+    else:
+        return "I can help with your billing/payment question. To assist you effectively, I need:\n\n1. Your account number or email\n2. What specific issue you're experiencing\n3. When this occurred\n\nI'll look into this right away."
+
+def _damaged_product_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Damaged product reports"""
+    if 'product' in tokens:
+        return "I'm sorry to hear your product arrived damaged! This is definitely not acceptable. Let me help you get this resolved immediately:\n\n1. Please provide your order number\n2. Describe the damage you see\n3. If possible, take photos of the damage\n4. I'll process a replacement or refund right away\n\nWhat's your order number? I want to make this right for you."
+    else:
+        return "I understand you have a damaged item. This is something we need to fix immediately. Please provide:\n\n1. Your order number\n2. Description of the damage\n3. When you received it\n4. I'll process a replacement or refund right away\n\nWhat's your order number?"
+
+def _return_refund_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Returns, refunds and wrong items"""
+    if 'wrong' in tokens and ('color' in tokens or 'item' in tokens):
+        return "I see you received the wrong item/color. This is definitely something we need to fix right away. Please provide:\n\n1. Your order number\n2. What you ordered vs. what you received\n3. Any photos if possible\n\nI'll process an immediate replacement and return label for the incorrect item."
+    elif 'shirt' in tokens or 'clothing' in tokens:
+        return "I understand you want to return the shirt/clothing you received. Here's how to proceed:\n\n1. Please provide your order number\n2. Explain the reason for return (wrong color, size, etc.)\n3. I'll generate a return label for you\n4. You'll receive a refund within 5-7 business days\n\nWhat's your order number?"
+    else:
+        return "I can help you with your return/refund request. To process this quickly, I need:\n\n1. Your order number\n2. Reason for return\n3. Whether you want a refund or exchange\n\nWhat's your order number?"
+
+def _product_info_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Product information, unless the message is about damage or returns"""
+    if tokens & _PRODUCT_SKIP_KWS:
+        return None  # Skip to the next matching rule
+    elif 'what is' in message_lower:
+        return "I'd be happy to explain what you're asking about! To give you the most helpful information, could you specify:\n\n1. Which product or feature you're interested in?\n2. What specific details you need?\n3. Are you looking for pricing, features, or how-to instructions?\n\nLet me know what would be most helpful!"
+    elif 'how to' in message_lower:
+        return "I'd be happy to show you how to do that! To provide the right guidance, I need to know:\n\n1. What specific task you want to accomplish?\n2. Which product or feature you're using?\n3. What step are you currently stuck on?\n\nI'll give you step-by-step instructions!"
+    else:
+        return "I'd be happy to provide product information! What specific details would you like to know?\n\n- Product features and specifications\n- Pricing and packages\n- Comparison with other products\n- How to use specific features\n\nWhat would be most helpful for you?"
+
+def _account_management_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Account management (passwords, logins, settings)"""
+    if 'password' in tokens:
+        return "I can help you with your password issue. To assist you quickly, I need to know:\n\n1. Are you trying to reset your password?\n2. Are you having trouble logging in?\n3. What's your email address?\n\nI'll help you get back into your account right away."
+    elif 'login' in tokens or 'signin' in tokens:
+        return "I understand you're having trouble logging in. Let me help you with that:\n\n1. What happens when you try to log in?\n2. Do you see any error messages?\n3. Are you using the correct email?\n\nI'll get you logged in quickly."
+    else:
+        return "I can help you with account-related questions. What specific account issue are you experiencing?\n\n• Password reset\n• Profile updates\n• Account settings\n• Login issues\n• Account creation\n\nLet me know what you need help with!"
+
+def _past_order_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Past order lookups"""
+    return "I'd be happy to help you with your past order! To assist you effectively, I need:\n\n1. Your order number or email address\n2. What specific information you need about the order\n3. When the order was placed\n\nWhat would you like to know about your order?"
+
+def _help_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """General help requests"""
+    if 'technical' in tokens:
+        return "I'm here to help with your technical issue! To assist you effectively, I need:\n\n1. What specific technical problem are you facing?\n2. What device/software are you using?\n3. What error messages do you see?\n\nLet me get this resolved for you quickly."
+    else:
+        return "I'm here to help! I can assist you with:\n\n• Technical support and troubleshooting\n• Billing and payment questions\n• Product information and features\n• Returns and refunds\n• Account management\n\nWhat specific help do you need today?"
+
+def _question_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """General questions"""
+    return "I'm here to answer your questions! Feel free to ask me about:\n\n• Our products and services\n• Technical support\n• Billing and payments\n• Returns and refunds\n• Account management\n\nWhat would you like to know?"
+
+def _complaint_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Complaints"""
+    return "I'm sorry to hear about your experience. I want to help resolve this issue and ensure it doesn't happen again. Could you please provide more details about what happened? I'm here to make this right for you."
+
+def _feedback_reply(tokens: set, message_lower: str, last_ai_response: str) -> Optional[str]:
+    """Feedback and suggestions"""
+    return "Thank you for your feedback! We value your input and use it to improve our services. Could you please elaborate on your suggestions? I'd love to hear your ideas for making our service better."
+
+# Fallback rules in priority order: (rule_id, keywords, reply function)
+FALLBACK_RULES = [
+    ("thanks", _THANKS_KWS, _thanks_reply),
+    ("greeting", _GREETING_KWS, _greeting_reply),
+    ("shirt_size", frozenset({'shirt'}), _shirt_size_reply),
+    ("technical_support", _TECH_KWS, _technical_support_reply),
+    ("billing", _BILLING_KWS, _billing_reply),
+    ("damaged_product", _DAMAGE_KWS, _damaged_product_reply),
+    ("return_refund", _RETURN_KWS, _return_refund_reply),
+    ("product_info", _PRODUCT_KWS, _product_info_reply),
+    ("account_management", _ACCOUNT_KWS, _account_management_reply),
+    ("past_order", _PAST_ORDER_KWS, _past_order_reply),
+    ("help", frozenset({'help'}), _help_reply),
+    ("question", _QUESTION_KWS, _question_reply),
+    ("complaint", _COMPLAINT_KWS, _complaint_reply),
+    ("feedback", _FEEDBACK_KWS, _feedback_reply),
+]
+
+def build_fallback_automaton() -> ahocorasick.Automaton:
+    """Build an Aho-Corasick automaton mapping each keyword to (length, rule priorities)"""
+    automaton = ahocorasick.Automaton()
+    for priority, (_, keywords, _) in enumerate(FALLBACK_RULES):
+        for keyword in keywords:
+            _, priorities = automaton.get(keyword, (len(keyword), ()))
+            automaton.add_word(keyword, (len(keyword), priorities + (priority,)))
+    automaton.make_automaton()
+    return automaton
+
+# Intent-based replies used when no keyword rule matched
+RESPONSE_TEMPLATES = {
+    "return_refund": "I understand you want to return or request a refund. Please provide your order number and the reason for your request. I'll help you with the process.",
+    "technical_support": "I understand you're experiencing a technical issue. Our support team will be happy to help you resolve this. Please provide more details about the problem, including any error messages you're seeing.",
+    "billing": "I can help you with billing questions. Could you please provide your account number or describe the specific billing issue you're experiencing? I'll make sure to get this resolved for you.",
+    "product_info": "I'd be happy to provide information about our products. What specific details would you like to know? I can help with features, pricing, or comparisons.",
+    "complaint": "I'm sorry to hear about your experience. I want to help resolve this issue and ensure it doesn't happen again. Could you please provide more details about what happened?",
+    "feedback": "Thank you for your feedback! We value your input and use it to improve our services. Could you please elaborate on your suggestions?",
+    "account_management": "I can help you with account-related questions. What specific account issue are you experiencing? I'll guide you through the process.",
+    "error": "I apologize for the technical difficulties. Please try again in a moment, or contact our support team if the issue persists.",
+}
+DEFAULT_RESPONSE = "Hello! I'm here to help you with any questions or concerns. How can I assist you today?"
+# Sentiment-aware openers for the default reply
+SENTIMENT_PREFIX = {
+    "negative": "I understand this is frustrating and I want to help resolve it quickly. ",
+    "positive": "I'm glad I can help! ",
+}
+
+@lru_cache(maxsize=64)
+def _build_reply(intent: str, sentiment: str) -> str:
+    """Template reply for an intent, or the sentiment-aware default; built once per pair"""
+    reply = RESPONSE_TEMPLATES.get(intent)
+    if reply is None:
+        reply = SENTIMENT_PREFIX.get(sentiment, "") + DEFAULT_RESPONSE
+    return reply
+
 class AIChatbot:
     """AI-powered chatbot with advanced NLP and OpenAI integration"""
     
     def __init__(self):
-        self.conversation_history = []
-        self.response_times = []
+        # Keep only the most recent entries for memory management
+        self.conversation_history = deque(maxlen=50_000)
+        # Aggregates over conversation_history, adjusted as entries are appended and evicted
+        self._sentiment_counts = Counter()
+        self._intent_counts = Counter()
+        self._entity_total = 0
+        # Per-session index into conversation_history, so session lookups don't scan it
+        self._by_session = defaultdict(deque)
+        self._session_meta = {}  # session_id -> {"start_time", "last_activity"}
+        self.response_times = deque(maxlen=10000)
+        self._rt_sum = 0.0  # Running sum of response_times, for an O(1) average
+        self.first_token_times = deque(maxlen=10000)
         self.query_count = 0
         self.nlp_processor = AdvancedNLPProcessor()
         self.session_data = {}
+        # Final responses for repeated queries; in-process in front of the shared Redis cache
+        self.response_cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+        self._cache_lock = threading.Lock()  # TTLCache is not thread-safe; never held across Redis I/O
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # All mutable state is shared by the executor threads: _lock guards the
+        # counters, histories and session index, _cache_lock the response cache
+        self._lock = threading.Lock()
+        self._fallback_ac = build_fallback_automaton()
+        
+        # Memoize the deterministic text processors
+        self._preprocess_cache = lru_cache(maxsize=NLP_CACHE_SIZE)(self._preprocess_text)
+        self._intent_cache = lru_cache(maxsize=NLP_CACHE_SIZE)(self._classify_intent)
+        
+        # Intent keywords with the first (highest priority) group of each word
+        keyword_priority = {}
+        for priority, (_, words, _) in enumerate(INTENT_MATCHERS):
+            for word in words:
+                keyword_priority.setdefault(word, priority)
+        self._intent_kw_priority = keyword_priority
+        self._intent_vocab = None  # Built on first use by classify_intent_batch
         
     def preprocess_text(self, text: str) -> str:
         """Advanced text preprocessing"""
-        try:
-            # Basic text cleaning
-            text = text.strip()
-            
-            # Remove extra whitespace
-            text = re.sub(r'\s+', ' ', text)
-            
-            # Normalize common abbreviations
-            text = re.sub(r'\b(?:pls|plz)\b', 'please', text, flags=re.IGNORECASE)
-            text = re.sub(r'\b(?:thx|tnx)\b', 'thanks', text, flags=re.IGNORECASE)
-            text = re.sub(r'\b(?:u|ur)\b', 'you', text, flags=re.IGNORECASE)
-            
-            return text
-        except Exception as e:
-            logger.error(f"Error preprocessing text: {e}")
-            return text
+        return self._preprocess_cache(text)
     
     def classify_intent(self, text: str) -> str:
         """Enhanced intent classification with context awareness"""
+        return self._intent_cache(text)
+    
+    def classify_intent_batch(self, texts: List[str]) -> List[str]:
+        """Classify many texts at once; same results as classify_intent"""
+        from nlp_kernels import SortedVocabulary, min_per_message, pack_tokens
+        
+        if self._intent_vocab is None:
+            self._intent_vocab = SortedVocabulary(self._intent_kw_priority)
+        
+        no_match = len(INTENT_MATCHERS)
+        lowered = [text.lower() for text in texts]
+        tokens, lengths, offsets = pack_tokens([_TOKEN_RE.findall(text) for text in lowered])
+        priorities = self._intent_vocab.lookup(tokens, no_match)
+        best = min_per_message(priorities, lengths, offsets, no_match)
+        
+        intents = []
+        for text, first in zip(lowered, best.tolist()):
+            # Phrases only matter for groups ranked above the best keyword match
+            for priority in range(first):
+                phrase_pattern = INTENT_MATCHERS[priority][2]
+                if phrase_pattern is not None and phrase_pattern.search(text):
+                    first = priority
+                    break
+            intents.append(INTENT_MATCHERS[first][0] if first < no_match else "general_inquiry")
+        return intents
+    
+    def _preprocess_text(self, text: str) -> str:
+        # Basic text cleaning
+        text = text.strip()
+        
+        # Remove extra whitespace
+        text = _WS_RE.sub(' ', text)
+        
+        # Normalize common abbreviations in a single pass
+        return _ABBREVIATION_RE.sub(lambda match: _ABBREVIATIONS[match.group(1).lower()], text)
+    
+    def _classify_intent(self, text: str) -> str:
         try:
             text_lower = text.lower()
             
-            # Return/Refund keywords (NEW - this was missing!)
-            return_refund_keywords = ['return', 'refund', 'exchange', 'wrong item', 'wrong color', 'wrong size', 'not what i ordered', 'send back', 'ship back', 'replace', 'swap', 'exchange', 'return policy', 'refund policy']
-            if any(word in text_lower for word in return_refund_keywords):
-                return "return_refund"
-            
-            # Technical support keywords (expanded)
-            tech_keywords = ['error', 'bug', 'problem', 'issue', 'crash', 'broken', 'not working', 'failed', 'failure', 'exception', 'timeout', 'slow', 'performance', 'lag', 'freeze', 'hang', 'unresponsive']
-            if any(word in text_lower for word in tech_keywords):
-                return "technical_support"
-            
-            # Billing keywords (expanded)
-            billing_keywords = ['bill', 'payment', 'charge', 'cost', 'price', 'subscription', 'refund', 'invoice', 'receipt', 'billing', 'account', 'credit', 'debit', 'overcharge', 'double charge']
-            if any(word in text_lower for word in billing_keywords):
-                return "billing"
-            
-            # Product information keywords (expanded) - but exclude damage/complaint words
-            product_keywords = ['product', 'feature', 'specification', 'what is', 'how to', 'guide', 'tutorial', 'manual', 'documentation', 'capabilities', 'functionality', 'benefits', 'comparison']
-            # Check for damage/complaint words first to avoid misclassification
-            damage_keywords = ['damaged', 'broken', 'defective', 'faulty', 'not working', 'problem', 'issue', 'damage', 'destroyed', 'torn', 'ripped', 'scratched', 'cracked']
-            if any(word in text_lower for word in damage_keywords):
-                return "return_refund"  # Prioritize damage issues over general product info
+            tokens = set(_TOKEN_RE.findall(text_lower))
             
-            if any(word in text_lower for word in product_keywords):
-                return "product_info"
-            
-            # Complaint keywords (expanded)
-            complaint_keywords = ['complaint', 'unhappy', 'dissatisfied', 'angry', 'frustrated', 'bad', 'terrible', 'awful', 'horrible', 'disappointed', 'upset', 'annoyed', 'irritated']
-            if any(word in text_lower for word in complaint_keywords):
-                return "complaint"
-            
-            # Feedback keywords (expanded)
-            feedback_keywords = ['feedback', 'suggest', 'improve', 'idea', 'recommendation', 'suggestion', 'opinion', 'thought', 'review', 'rating', 'comment']
-            if any(word in text_lower for word in feedback_keywords):
-                return "feedback"
-            
-            # Account management keywords
-            account_keywords = ['account', 'profile', 'settings', 'preferences', 'password', 'login', 'signin', 'signup', 'register', 'create account', 'delete account']
-            if any(word in text_lower for word in account_keywords):
-                return "account_management"
-            
-            # General inquiry keywords (reduced priority)
-            general_keywords = ['hello', 'hi', 'help', 'support', 'question', 'info', 'information', 'assist', 'assistance', 'guide', 'how', 'what', 'when', 'where', 'why']
-            if any(word in text_lower for word in general_keywords):
-                return "general_inquiry"
+            for intent_name, words, phrase_pattern in INTENT_MATCHERS:
+                if tokens & words or (phrase_pattern is not None and phrase_pattern.search(text_lower)):
+                    return intent_name
             
             return "general_inquiry"
                 
@@ -243,48 +692,94 @@ class AIChatbot:
             logger.error(f"Error classifying intent: {e}")
             return "general_inquiry"
     
-    def generate_response(self, user_message: str, context: List[Dict] = None, session_id: str = None) -> Dict:
+    def generate_response(self, user_message: str, context: Optional[List[Dict]] = None, session_id: Optional[str] = None,
+                          analysis: Optional[MessageAnalysis] = None, start_time: Optional[float] = None) -> Dict:
         """Generate enhanced AI response with NLP processing"""
-        start_time = time.time()
+        events = self.generate_response_stream(user_message, context, session_id, analysis, start_time)
+        return next(data for event, data in events if event == "response")
+    
+    def analyze_batch(self, messages: List[str]) -> List[MessageAnalysis]:
+        """Run the NLP stage for many messages at once"""
+        processed = [self.preprocess_text(message) for message in messages]
+        intents = self.classify_intent_batch(processed)
+        sentiments = self.nlp_processor.analyze_sentiment_batch(processed)
+        return [
+            MessageAnalysis(processed_message, self.nlp_processor.extract_entities(processed_message), sentiment, intent)
+            for processed_message, sentiment, intent in zip(processed, sentiments, intents)
+        ]
+    
+    def generate_response_batch(self, messages: List[str], context: Optional[List[Dict]] = None, session_id: Optional[str] = None) -> List[Dict]:
+        """Generate responses for many messages, running the NLP stage for all of them at once"""
+        start_time = time.time()  # Response times include the shared NLP stage
+        return [
+            self.generate_response(message, context, session_id, analysis, start_time)
+            for message, analysis in zip(messages, self.analyze_batch(messages))
+        ]
+    
+    def _stream_openai_response(self, messages: List[Any]) -> Iterator[str]:
+        """Yield response text from OpenAI as tokens arrive"""
+        assert client is not None
+        stream = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            max_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+    
+    def generate_response_stream(self, user_message: str, context: Optional[List[Dict]] = None, session_id: Optional[str] = None,
+                                 analysis: Optional[MessageAnalysis] = None, start_time: Optional[float] = None) -> Iterator[Tuple[str, Any]]:
+        """Generate a response as ("delta", text) events followed by one ("response", dict) event
+        
+        A precomputed analysis (see generate_response_batch) skips the per-message NLP stage;
+        pass the time that analysis started as start_time so response times still cover it.
+        """
+        if start_time is None:
+            start_time = time.time()
+        first_token_time = None
         
         try:
-            # Preprocess text
-            processed_message = self.preprocess_text(user_message)
-            
-            # Extract entities
-            entities = self.nlp_processor.extract_entities(processed_message)
-            
-            # Analyze sentiment
-            sentiment = self.nlp_processor.analyze_sentiment(processed_message)
-            
-            # Classify intent
-            intent = self.classify_intent(processed_message)
-            
             # Prepare conversation context
             if context is None:
                 context = []
             
-            # Add system message with enhanced context
+            # Repeated queries replay the cached answer and skip NLP and OpenAI entirely
+            cache_key = self._response_cache_key(user_message, context)
+            cached = self._get_cached_response(cache_key)
+            if cached is not None:
+                yield from self._replay_cached_response(cached, user_message, session_id, start_time)
+                return
+            
+            if analysis is not None:
+                processed_message, entities, sentiment, intent = analysis
+            else:
+                # Preprocess text
+                processed_message = self.preprocess_text(user_message)
+                
+                # Extract entities
+                entities = self.nlp_processor.extract_entities(processed_message)
+                
+                # Analyze sentiment
+                sentiment = self.nlp_processor.analyze_sentiment(processed_message)
+                
+                # Classify intent
+                intent = self.classify_intent(processed_message)
+            
+            # Technical support messages usually carry user-specific identifiers and are never cached
+            cacheable = intent != "technical_support"
+            
+            # Add system message with enhanced context; only the middle section varies per request
+            entities_str = ', '.join(f'{e.type}: {e.text}' for e in entities) or 'None'
             system_message = {
                 "role": "system",
-                "content": f"""You are a professional, helpful customer support AI assistant. 
-
-User's Intent: {intent}
-Sentiment: {sentiment.sentiment} (confidence: {sentiment.confidence:.2f})
-Entities Detected: {[f"{e.type}: {e.text}" for e in entities]}
-
-CRITICAL GUIDELINES:
-- ALWAYS address the user's specific intent first - don't give generic responses
-- If intent is "return_refund" or mentions damage/defects, focus on helping with returns/refunds
-- If intent is "technical_support", focus on troubleshooting and technical assistance
-- If intent is "billing", focus on payment and account issues
-- If intent is "product_info", provide specific product details, not generic help
-- Keep responses concise and professional (under 150 words)
-- If sentiment is negative, be extra empathetic and helpful
-- Always ask for specific details needed to help (order numbers, account info, etc.)
-- Offer to escalate to human support if needed
-- Be conversational but professional
-- NEVER give generic "how can I help" responses when user has a specific issue"""
+                "content": f"{SYSTEM_PROMPT_HEADER}\n\nUser's Intent: {intent}\n"
+                           f"Sentiment: {sentiment.sentiment} (confidence: {sentiment.confidence:.2f})\n"
+                           f"Entities Detected: {entities_str}\n\n{SYSTEM_PROMPT_GUIDELINES}"
             }
             
             # Prepare messages for OpenAI
@@ -292,37 +787,43 @@ CRITICAL GUIDELINES:
             
             # Generate response using OpenAI
             ai_response = ""
-            logger.info(f"OpenAI client available: {client is not None}, API key configured: {bool(OPENAI_API_KEY and OPENAI_API_KEY != 'your_openai_api_key_here')}")
+            logger.debug("OpenAI client available: %s, API key configured: %s",
+                         client is not None, bool(OPENAI_API_KEY and OPENAI_API_KEY != 'your_openai_api_key_here'))
             
             if client and OPENAI_API_KEY and OPENAI_API_KEY != "your_openai_api_key_here":
+                parts = []
                 try:
-                    response = client.chat.completions.create(
-                        model=OPENAI_MODEL,
-                        messages=messages,
-                        max_tokens=MAX_TOKENS,
-                        temperature=TEMPERATURE
-                    )
-                    ai_response = response.choices[0].message.content
-                    logger.info("Using OpenAI API response")
+                    for delta in self._stream_openai_response(messages):
+                        if first_token_time is None:
+                            first_token_time = time.time()
+                        parts.append(delta)
+                        yield "delta", delta
+                    logger.debug("Using OpenAI API response")
                 except Exception as e:
                     logger.error(f"Error calling OpenAI API: {e}")
+                    cacheable = False  # Don't keep partial or degraded answers
+                # Keep whatever was already streamed if the API failed midway
+                ai_response = "".join(parts)
+                if not ai_response:
                     ai_response = self._generate_fallback_response(intent, processed_message, sentiment, context)
-                    logger.info("Using fallback response due to OpenAI API error")
+                    logger.debug("Using fallback response due to OpenAI API error")
             else:
                 # Enhanced fallback response when OpenAI is not available
                 ai_response = self._generate_fallback_response(intent, processed_message, sentiment, context)
-                logger.info("Using fallback response - OpenAI not available")
+                logger.debug("Using fallback response - OpenAI not available")
             
-            # Calculate response time
-            response_time = time.time() - start_time
-            self.response_times.append(response_time)
+            if first_token_time is None:
+                # Fallback responses arrive in one piece
+                first_token_time = time.time()
+                yield "delta", ai_response
             
-            # Update metrics
-            self.query_count += 1
+            # Calculate response time (total and time to first token)
+            response_time = time.time() - start_time
+            first_token_latency = first_token_time - start_time
             
             # Store enhanced conversation data
             conversation_entry = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": start_time,  # Formatted only when serialized
                 "user_message": processed_message,
                 "ai_response": ai_response,
                 "intent": intent,
@@ -330,40 +831,122 @@ CRITICAL GUIDELINES:
                 "sentiment_confidence": sentiment.confidence,
                 "entities": [{"type": e.type, "text": e.text, "confidence": e.confidence} for e in entities],
                 "response_time": response_time,
-                "query_id": self.query_count,
                 "session_id": session_id
             }
-            self.conversation_history.append(conversation_entry)
-            
-            # Keep only last 1000 conversations for memory management
-            if len(self.conversation_history) > 1000:
-                self.conversation_history = self.conversation_history[-1000:]
+            query_id = self._record_query(conversation_entry, first_token_latency, cache_hit=False)
             
-            return {
+            response = {
                 "response": ai_response,
                 "intent": intent,
                 "sentiment": sentiment.sentiment,
                 "entities": [{"type": e.type, "text": e.text} for e in entities],
                 "response_time": response_time,
-                "query_id": self.query_count,
-                "timestamp": conversation_entry["timestamp"],
-                "suggestions": self._generate_suggestions(intent, sentiment)
+                "first_token_time": first_token_latency,
+                "query_id": query_id,
+                "timestamp": format_timestamp(start_time),
+                "suggestions": self._generate_suggestions(intent, sentiment),
+                "cache_hit": False
             }
+            if cacheable:
+                self._store_cached_response(cache_key, {
+                    "response": response,
+                    "sentiment_confidence": sentiment.confidence,
+                    "entities": conversation_entry["entities"]
+                })
+            yield "response", response
             
         except Exception as e:
             logger.error(f"Error generating response: {e}")
             response_time = time.time() - start_time
-            return {
+            yield "response", {
                 "response": "I apologize, but I'm experiencing technical difficulties. Please try again in a moment.",
                 "intent": "error",
                 "sentiment": "neutral",
                 "entities": [],
                 "response_time": response_time,
                 "query_id": self.query_count,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": format_timestamp(start_time),
                 "suggestions": ["Try rephrasing your question", "Contact human support", "Check your internet connection"]
             }
     
+    def _response_cache_key(self, user_message: str, context: List[Dict]) -> str:
+        """Cache key over the normalized message and the recent conversation turns"""
+        raw = user_message.lower().strip() + '|' + json.dumps(context[-4:]) + '|' + RESPONSE_CACHE_VERSION
+        return "chat:" + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    
+    def _get_cached_response(self, cache_key: str) -> Optional[Dict]:
+        """Look up a cached answer in-process first, then in Redis"""
+        with self._cache_lock:
+            cached = self.response_cache.get(cache_key)
+        if cached is None and redis_client is not None:
+            try:
+                payload = redis_client.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Redis cache lookup failed: {e}")
+                return None
+            if payload is not None:
+                cached = json.loads(payload)
+                with self._cache_lock:
+                    self.response_cache[cache_key] = cached
+        return cached
+    
+    def _store_cached_response(self, cache_key: str, cached: Dict) -> None:
+        """Store an answer in-process and in Redis"""
+        with self._cache_lock:
+            self.response_cache[cache_key] = cached
+        if redis_client is not None:
+            try:
+                redis_client.setex(cache_key, RESPONSE_CACHE_TTL, json.dumps(cached))
+            except Exception as e:
+                logger.warning(f"Redis cache store failed: {e}")
+    
+    def _replay_cached_response(self, cached: Dict, user_message: str, session_id: Optional[str], start_time: float) -> Iterator[Tuple[str, Any]]:
+        """Record a cache hit and yield its events like a freshly generated response"""
+        answer = cached["response"]
+        query_id = self._record_query({
+            "timestamp": start_time,
+            "user_message": self.preprocess_text(user_message),
+            "ai_response": answer["response"],
+            "intent": answer["intent"],
+            "sentiment": answer["sentiment"],
+            "sentiment_confidence": cached["sentiment_confidence"],
+            "entities": cached["entities"],
+            "response_time": 0.0,
+            "session_id": session_id
+        }, 0.0, cache_hit=True)
+        
+        response = dict(
+            answer,
+            response_time=0.0,
+            first_token_time=0.0,
+            query_id=query_id,
+            timestamp=format_timestamp(start_time),
+            cache_hit=True
+        )
+        yield "delta", response["response"]
+        yield "response", response
+    
+    def _record_query(self, conversation_entry: Dict, first_token_latency: float, cache_hit: bool) -> int:
+        """Assign the next query ID to a conversation entry and update the metrics"""
+        with self._lock:
+            self.query_count += 1
+            if cache_hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+            conversation_entry["query_id"] = self.query_count
+            if len(self.conversation_history) == self.conversation_history.maxlen:
+                self._update_aggregates(self.conversation_history[0], -1)  # About to be evicted
+            self.conversation_history.append(conversation_entry)
+            self._update_aggregates(conversation_entry, 1)
+            response_time = conversation_entry["response_time"]
+            if len(self.response_times) == self.response_times.maxlen:
+                self._rt_sum -= self.response_times[0]  # About to be evicted
+            self.response_times.append(response_time)
+            self._rt_sum += response_time
+            self.first_token_times.append(first_token_latency)
+            return self.query_count
+    
     def _generate_suggestions(self, intent: str, sentiment: SentimentAnalysis) -> List[str]:
         """Generate contextual suggestions based on intent and sentiment"""
         suggestions = []
@@ -398,224 +981,185 @@ CRITICAL GUIDELINES:
         
         return suggestions[:3]  # Limit to 3 suggestions
     
-    def _generate_fallback_response(self, intent: str, message: str, sentiment: SentimentAnalysis, context: List[Dict] = None) -> str:
+    def _generate_fallback_response(self, intent: str, message: str, sentiment: SentimentAnalysis, context: Optional[List[Dict]] = None) -> str:
         """Generate highly specific, contextual fallback responses when OpenAI is unavailable"""
         
-        logger.info(f"Fallback method called with intent: {intent}, message: {message}")
+        logger.debug("Fallback method called with intent: %s, message: %s", intent, message)
         message_lower = message.lower()
+        tokens = set(_TOKEN_RE.findall(message_lower))
+        
+        # Get the last AI response to understand the conversation context
+        last_ai_response = ""
+        for msg in (context or [])[::-1]:
+            if msg.get("role") == "assistant":
+                last_ai_response = msg.get("content", "").lower()
+                break
         
         # Check if this is a follow-up response (order number, account info, etc.)
-        if context and len(context) > 0:
-            # Get the last AI response to understand the conversation context
-            last_ai_response = ""
-            for msg in reversed(context):
-                if msg.get("role") == "assistant":
-                    last_ai_response = msg.get("content", "").lower()
-                    break
-            
+        if last_ai_response:
             # If last response asked for order number and current message looks like an order number
-            if any(phrase in last_ai_response for phrase in ["order number", "what's your order number", "please provide your order number"]):
-                if re.match(r'^\d{10,20}$', message.strip()):  # Looks like an order number
+            if any(phrase in last_ai_response for phrase in _ASKED_ORDER_NUMBER_PHRASES):
+                if _ORDER_NUMBER_RE.match(message.strip()):  # Looks like an order number
                     return "Perfect! I have your order number. Now I need a few more details to process your request:\n\n1. Can you describe the damage you see?\n2. When did you receive the order?\n3. Would you prefer a replacement or refund?\n\nOnce I have these details, I'll process your request immediately."
             
             # If last response asked for damage description and current message describes damage
-            if any(phrase in last_ai_response for phrase in ["describe the damage", "damage you see", "description of the damage"]):
-                if any(word in message_lower for word in ["broken", "damaged", "cracked", "torn", "scratched", "defective"]):
+            if any(phrase in last_ai_response for phrase in _ASKED_DAMAGE_PHRASES):
+                if tokens & _DAMAGE_DESCRIPTION_KWS:
                     return "Thank you for the damage description. I'm processing your replacement/refund request now.\n\nYour request has been submitted and you should receive a confirmation email within 5 minutes. A return label will be sent to your email address.\n\nIs there anything else I can help you with today?"
             
             # If last response asked for preference (replacement/refund) - more flexible matching
-            if any(phrase in last_ai_response for phrase in ["replacement or refund", "prefer a replacement", "refund or exchange", "replacement/refund", "would you prefer", "prefer a"]):
-                if any(word in message_lower for word in ["replacement", "replace", "new", "exchange"]):
+            if any(phrase in last_ai_response for phrase in _ASKED_PREFERENCE_PHRASES):
+                if tokens & _REPLACEMENT_KWS:
                     return "Perfect! I've processed your replacement request. A new item will be shipped to you within 2-3 business days. You'll receive tracking information via email.\n\nThank you for your patience, and I apologize for the inconvenience. Is there anything else I can help you with?"
-                elif any(word in message_lower for word in ["refund", "money back", "return"]):
+                elif tokens & _REFUND_KWS or 'money back' in message_lower:
                     return "Perfect! I've processed your refund request. The refund will be processed within 5-7 business days and will be credited back to your original payment method.\n\nThank you for your patience, and I apologize for the inconvenience. Is there anything else I can help you with?"
             
             # If last response was about processing the request (more flexible)
-            if any(phrase in last_ai_response for phrase in ["processing your", "request has been submitted", "confirmation email", "return label"]):
-                if any(word in message_lower for word in ["replacement", "replace", "new", "exchange"]):
+            if any(phrase in last_ai_response for phrase in _PROCESSING_PHRASES):
+                if tokens & _REPLACEMENT_KWS:
                     return "Perfect! I've processed your replacement request. A new item will be shipped to you within 2-3 business days. You'll receive tracking information via email.\n\nThank you for your patience, and I apologize for the inconvenience. Is there anything else I can help you with?"
-                elif any(word in message_lower for word in ["refund", "money back", "return"]):
+                elif tokens & _REFUND_KWS or 'money back' in message_lower:
                     return "Perfect! I've processed your refund request. The refund will be processed within 5-7 business days and will be credited back to your original payment method.\n\nThank you for your patience, and I apologize for the inconvenience. Is there anything else I can help you with?"
         
-        # THANK YOU responses (HIGH PRIORITY - check this first!)
-        if any(word in message_lower for word in ['thank you', 'thanks', 'thank', 'appreciate it', 'great', 'perfect']):
-            if context and len(context) > 0:
-                # Check if this is after a successful resolution
-                last_ai_response = ""
-                for msg in reversed(context):
-                    if msg.get("role") == "assistant":
-                        last_ai_response = msg.get("content", "").lower()
-                        break
-                
-                if any(phrase in last_ai_response for phrase in ["processed your", "shipped to you", "tracking information", "refund will be processed"]):
-                    return "You're very welcome! I'm glad I could help resolve your issue. Your request has been successfully processed and you'll receive all the necessary information via email.\n\nIf you need any further assistance in the future, don't hesitate to reach out. Have a great day! 😊"
-            
-            return "You're welcome! I'm here to help. Is there anything else I can assist you with today?"
-        
-        # HIGHLY SPECIFIC responses based on exact user input
-        if 'hi' in message_lower or 'hello' in message_lower:
-            if 'shirt' in message_lower or 'size' in message_lower:
-                return "Hello! I see you mentioned a shirt size issue. Let me help you with that specifically. What size did you order and what size did you receive? I'll get this sorted out right away."
-            elif 'problem' in message_lower or 'issue' in message_lower:
-                return "Hello! I understand you're experiencing a problem. Let me help you resolve it. Can you tell me more about what's happening?"
-            else:
-                return "Hello! I'm here to help you with any questions or concerns. How can I assist you today?"
-        
-        # SHIRT SIZE SPECIFIC responses
-        if 'shirt' in message_lower and 'size' in message_lower:
-            if 'small' in message_lower:
-                return "I see you're having an issue with a small shirt size. Let me help you get the right size:\n\n1. What size did you actually order?\n2. What size did you receive?\n3. What's your order number?\n\nI can help you get the correct size or process an exchange immediately."
-            elif 'big' in message_lower or 'large' in message_lower:
-                return "I understand the shirt you received is too big. Let me help you get the right size:\n\n1. What size did you order?\n2. What size did you receive?\n3. What's your order number?\n\nI'll process a size exchange for you right away."
-            else:
-                return "I see you're having a shirt sizing issue. To help you quickly, I need:\n\n1. Your order number\n2. What size you ordered vs. received\n3. Whether you want an exchange or refund\n\nWhat's your order number?"
-        
-        # TECHNICAL SUPPORT SPECIFIC responses (HIGH PRIORITY)
-        if any(word in message_lower for word in ['app', 'crash', 'not working', 'error', 'bug', 'problem', 'crashing', 'crashed']):
-            # Check for app crash specifically (more flexible)
-            if 'app' in message_lower and any(crash_word in message_lower for crash_word in ['crash', 'crashing', 'crashed']):
-                return "I understand your app is crashing. Let me help troubleshoot this specific issue:\n\n1. What device are you using? (iOS/Android/Desktop)\n2. What's your app version?\n3. What were you doing when it crashed?\n4. Does this happen every time?\n\nThis will help me provide the right solution or escalate to our technical team."
-            elif 'not working' in message_lower:
-                return "I see something isn't working for you. To help fix this quickly, I need to know:\n\n1. What exactly isn't working?\n2. What were you trying to do?\n3. What error messages do you see?\n4. When did this start happening?\n\nLet me get this resolved for you right away."
-            else:
-                return "I understand you're experiencing a technical issue. Our support team will help you resolve this. Please provide:\n\n1. What specific problem you're facing\n2. Any error messages you see\n3. What you were doing when it happened\n\nI'll make sure this gets resolved quickly."
-        
-        # BILLING SPECIFIC responses
-        if any(word in message_lower for word in ['bill', 'payment', 'charge', 'cost', 'price']):
-            if 'bill' in message_lower:
-                return "I can help with your billing question. To assist you effectively, I need:\n\n1. Your account number or email\n2. What specific billing issue you're experiencing\n3. When this occurred\n\nI'll look into this right away and get it resolved for you."
-            elif 'payment' in message_lower:
-                return "I understand you have a payment question. Let me help you with that:\n\n1. What payment method are you using?\n2. What specific payment issue are you facing?\n3. When did this happen?\n\nI'll get this sorted out for you immediately."
-            else:
-                return "I can help with your billing/payment question. To assist you effectively, I need:\n\n1. Your account number or email\n2. What specific issue you're experiencing\n3. When this occurred\n\nI'll look into this right away."
+        # Keyword rules, most specific first; a rule may decline and defer to the next match
+        matched = set()
+        for end, (length, priorities) in self._fallback_ac.iter(message_lower):
+            start = end - length + 1
+            if (start == 0 or not _is_word_char(message_lower[start - 1])) and \
+                    (end + 1 == len(message_lower) or not _is_word_char(message_lower[end + 1])):
+                matched.update(priorities)
         
-        # DAMAGED PRODUCT SPECIFIC responses (HIGHEST PRIORITY - check this first!)
-        if any(word in message_lower for word in ['damaged', 'broken', 'defective', 'faulty', 'destroyed', 'torn', 'ripped', 'scratched', 'cracked']):
-            if 'product' in message_lower:
-                return "I'm sorry to hear your product arrived damaged! This is definitely not acceptable. Let me help you get this resolved immediately:\n\n1. Please provide your order number\n2. Describe the damage you see\n3. If possible, take photos of the damage\n4. I'll process a replacement or refund right away\n\nWhat's your order number? I want to make this right for you."
-            else:
-                return "I understand you have a damaged item. This is something we need to fix immediately. Please provide:\n\n1. Your order number\n2. Description of the damage\n3. When you received it\n4. I'll process a replacement or refund right away\n\nWhat's your order number?"
-        
-        # RETURN/REFUND SPECIFIC responses (HIGH PRIORITY)
-        if any(word in message_lower for word in ['return', 'refund', 'exchange', 'wrong']):
-            if 'wrong' in message_lower and ('color' in message_lower or 'item' in message_lower):
-                return "I see you received the wrong item/color. This is definitely something we need to fix right away. Please provide:\n\n1. Your order number\n2. What you ordered vs. what you received\n3. Any photos if possible\n\nI'll process an immediate replacement and return label for the incorrect item."
-            elif 'shirt' in message_lower or 'clothing' in message_lower:
-                return "I understand you want to return the shirt/clothing you received. Here's how to proceed:\n\n1. Please provide your order number\n2. Explain the reason for return (wrong color, size, etc.)\n3. I'll generate a return label for you\n4. You'll receive a refund within 5-7 business days\n\nWhat's your order number?"
-            else:
-                return "I can help you with your return/refund request. To process this quickly, I need:\n\n1. Your order number\n2. Reason for return\n3. Whether you want a refund or exchange\n\nWhat's your order number?"
-        
-        # PRODUCT INFORMATION SPECIFIC responses (LOWER PRIORITY - only if no damage/return issues)
-        if any(word in message_lower for word in ['product', 'feature', 'what is', 'how to']):
-            # Skip if this is about damage or returns
-            if any(word in message_lower for word in ['damaged', 'broken', 'defective', 'faulty', 'return', 'refund', 'exchange']):
-                pass  # Skip to next check
-            elif 'what is' in message_lower:
-                return "I'd be happy to explain what you're asking about! To give you the most helpful information, could you specify:\n\n1. Which product or feature you're interested in?\n2. What specific details you need?\n3. Are you looking for pricing, features, or how-to instructions?\n\nLet me know what would be most helpful!"
-            elif 'how to' in message_lower:
-                return "I'd be happy to show you how to do that! To provide the right guidance, I need to know:\n\n1. What specific task you want to accomplish?\n2. Which product or feature you're using?\n3. What step are you currently stuck on?\n\nI'll give you step-by-step instructions!"
-            else:
-                return "I'd be happy to provide product information! What specific details would you like to know?\n\n- Product features and specifications\n- Pricing and packages\n- Comparison with other products\n- How to use specific features\n\nWhat would be most helpful for you?"
-        
-        # ACCOUNT MANAGEMENT SPECIFIC responses
-        if any(word in message_lower for word in ['account', 'password', 'login', 'signin', 'signup']):
-            if 'password' in message_lower:
-                return "I can help you with your password issue. To assist you quickly, I need to know:\n\n1. Are you trying to reset your password?\n2. Are you having trouble logging in?\n3. What's your email address?\n\nI'll help you get back into your account right away."
-            elif 'login' in message_lower or 'signin' in message_lower:
-                return "I understand you're having trouble logging in. Let me help you with that:\n\n1. What happens when you try to log in?\n2. Do you see any error messages?\n3. Are you using the correct email?\n\nI'll get you logged in quickly."
-            else:
-                return "I can help you with account-related questions. What specific account issue are you experiencing?\n\n• Password reset\n• Profile updates\n• Account settings\n• Login issues\n• Account creation\n\nLet me know what you need help with!"
-        
-        # PAST ORDER SPECIFIC responses
-        if any(word in message_lower for word in ['past order', 'previous order', 'order history']):
-            return "I'd be happy to help you with your past order! To assist you effectively, I need:\n\n1. Your order number or email address\n2. What specific information you need about the order\n3. When the order was placed\n\nWhat would you like to know about your order?"
-        
-        # HELP SPECIFIC responses
-        if 'help' in message_lower:
-            if 'technical' in message_lower:
-                return "I'm here to help with your technical issue! To assist you effectively, I need:\n\n1. What specific technical problem are you facing?\n2. What device/software are you using?\n3. What error messages do you see?\n\nLet me get this resolved for you quickly."
-            else:
-                return "I'm here to help! I can assist you with:\n\n• Technical support and troubleshooting\n• Billing and payment questions\n• Product information and features\n• Returns and refunds\n• Account management\n\nWhat specific help do you need today?"
-        
-        # QUESTION/ASK SPECIFIC responses
-        if any(word in message_lower for word in ['question', 'ask']):
-            return "I'm here to answer your questions! Feel free to ask me about:\n\n• Our products and services\n• Technical support\n• Billing and payments\n• Returns and refunds\n• Account management\n\nWhat would you like to know?"
-        
-        # COMPLAINT SPECIFIC responses
-        if any(word in message_lower for word in ['complaint', 'unhappy', 'dissatisfied', 'angry', 'frustrated']):
-            return "I'm sorry to hear about your experience. I want to help resolve this issue and ensure it doesn't happen again. Could you please provide more details about what happened? I'm here to make this right for you."
-        
-        # FEEDBACK SPECIFIC responses
-        if any(word in message_lower for word in ['feedback', 'suggest', 'improve', 'idea']):
-            return "Thank you for your feedback! We value your input and use it to improve our services. Could you please elaborate on your suggestions? I'd love to hear your ideas for making our service better."
+        for priority in sorted(matched):
+            reply = FALLBACK_RULES[priority][2](tokens, message_lower, last_ai_response)
+            if reply:
+                return reply
         
         # INTENT-BASED responses as final fallback (only if no specific keywords matched)
-        if intent == "return_refund":
-            return "I understand you want to return or request a refund. Please provide your order number and the reason for your request. I'll help you with the process."
-        elif intent == "technical_support":
-            return "I understand you're experiencing a technical issue. Our support team will be happy to help you resolve this. Please provide more details about the problem, including any error messages you're seeing."
-        elif intent == "billing":
-            return "I can help you with billing questions. Could you please provide your account number or describe the specific billing issue you're experiencing? I'll make sure to get this resolved for you."
-        elif intent == "product_info":
-            return "I'd be happy to provide information about our products. What specific details would you like to know? I can help with features, pricing, or comparisons."
-        elif intent == "complaint":
-            return "I'm sorry to hear about your experience. I want to help resolve this issue and ensure it doesn't happen again. Could you please provide more details about what happened?"
-        elif intent == "feedback":
-            return "Thank you for your feedback! We value your input and use it to improve our services. Could you please elaborate on your suggestions?"
-        elif intent == "account_management":
-            return "I can help you with account-related questions. What specific account issue are you experiencing? I'll guide you through the process."
-        elif intent == "error":
-            return "I apologize for the technical difficulties. Please try again in a moment, or contact our support team if the issue persists."
-        
-        # Final fallback with sentiment awareness
-        base_response = "Hello! I'm here to help you with any questions or concerns. How can I assist you today?"
-        
-        if sentiment.sentiment == "negative":
-            base_response = "I understand this is frustrating and I want to help resolve it quickly. " + base_response
-        elif sentiment.sentiment == "positive":
-            base_response = "I'm glad I can help! " + base_response
+        return _build_reply(intent, sentiment.sentiment)
+    
+    def _update_aggregates(self, conversation_entry: Dict, delta: int) -> None:
+        """Add (delta=1) or remove (delta=-1) a conversation entry from the aggregates"""
+        for counts, key in ((self._sentiment_counts, conversation_entry["sentiment"]),
+                            (self._intent_counts, conversation_entry["intent"])):
+            counts[key] += delta
+            if not counts[key]:
+                del counts[key]
+        self._entity_total += delta * len(conversation_entry["entities"])
         
-        return base_response
+        session_id = conversation_entry["session_id"]
+        if not session_id:
+            return
+        entries = self._by_session[session_id]
+        timestamp = conversation_entry["timestamp"]
+        if delta > 0:
+            entries.append(conversation_entry)
+            meta = self._session_meta.setdefault(session_id, {"start_time": timestamp, "last_activity": timestamp})
+            meta["start_time"] = min(meta["start_time"], timestamp)
+            meta["last_activity"] = max(meta["last_activity"], timestamp)
+        else:
+            entries.popleft()  # Evictions are oldest first, overall and per session
+            if entries:
+                # O(1) under the lock: entries are in record order, so the oldest retained
+                # entry now starts the session (concurrent requests can record slightly
+                # out of start order, which only shifts start_time by their overlap)
+                meta = self._session_meta[session_id]
+                meta["start_time"] = entries[0]["timestamp"]
+                if timestamp >= meta["last_activity"]:
+                    # Only when the evicted entry was itself the latest activity
+                    meta["last_activity"] = max(entry["timestamp"] for entry in entries)
+            else:
+                del self._by_session[session_id]
+                del self._session_meta[session_id]
+    
+    def average_response_time(self) -> float:
+        """Mean of the retained response times"""
+        with self._lock:
+            count = len(self.response_times)
+            return self._rt_sum / count if count else 0.0
     
     def get_analytics(self) -> Dict:
         """Get enhanced chatbot analytics and performance metrics"""
         if not self.response_times:
             return {"error": "No data available"}
         
-        avg_response_time = np.mean(self.response_times)
+        avg_response_time = self.average_response_time()
         response_time_reduction = 0.4  # 40% reduction as mentioned in requirements
         
-        # Calculate sentiment distribution
-        sentiment_counts = {}
-        for conv in self.conversation_history:
-            sentiment = conv.get('sentiment', 'neutral')
-            sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + 1
-        
-        # Calculate intent distribution
-        intent_counts = {}
-        for conv in self.conversation_history:
-            intent = conv.get('intent', 'general_inquiry')
-            intent_counts[intent] = intent_counts.get(intent, 0) + 1
+        # Distributions are maintained incrementally by _record_query
+        with self._lock:
+            total_queries = self.query_count
+            cache_hits = self.cache_hits
+            cache_misses = self.cache_misses
+            sentiment_counts = dict(self._sentiment_counts)
+            intent_counts = dict(self._intent_counts)
+            entity_total = self._entity_total
+            conversations_stored = len(self.conversation_history)
         
         return {
-            "total_queries": self.query_count,
+            "total_queries": total_queries,
             "average_response_time": round(avg_response_time, 3),
             "response_time_reduction": f"{response_time_reduction * 100}%",
-            "conversations_stored": len(self.conversation_history),
+            "conversations_stored": conversations_stored,
             "uptime_percentage": "99.9%",
-            "last_updated": datetime.now().isoformat(),
+            "last_updated": current_timestamp(),
             "sentiment_distribution": sentiment_counts,
             "intent_distribution": intent_counts,
             "performance_metrics": {
                 "avg_response_time_ms": round(avg_response_time * 1000, 0),
-                "total_entities_extracted": sum(len(conv.get('entities', [])) for conv in self.conversation_history),
-                "success_rate": "99.5%"
+                "total_entities_extracted": entity_total,
+                "success_rate": "99.5%",
+                "cache_hits": cache_hits,
+                "cache_misses": cache_misses
             }
         }
+    
+    def get_session_data(self, session_id: str) -> Optional[Dict]:
+        """Summarize one session's stored conversations, or None if there are none"""
+        with self._lock:
+            entries = list(self._by_session.get(session_id, ()))
+            meta = self._session_meta.get(session_id)
+        if not entries or meta is None:
+            return None
+        
+        return {
+            "session_id": session_id,
+            "conversations": len(entries),
+            "start_time": format_timestamp(meta["start_time"]),
+            "last_activity": format_timestamp(meta["last_activity"]),
+            "intents": [entry["intent"] for entry in entries],
+            "sentiments": [entry["sentiment"] for entry in entries]
+        }
+    
+    def recent_conversations(self, limit: int) -> List[Dict]:
+        """The newest stored conversation entries, oldest first"""
+        with self._lock:
+            # deque has no slicing; walk back from the newest entry instead
+            return list(islice(reversed(self.conversation_history), limit))[::-1]
+    
+    def session_summary(self) -> Dict:
+        """Session count and average conversation entries per session"""
+        with self._lock:
+            total_sessions = len(self._by_session)
+            conversations_stored = len(self.conversation_history)
+        return {
+            "total_sessions": total_sessions,
+            "avg_session_length": conversations_stored / max(1, total_sessions)
+        }
 
 # Initialize chatbot
 chatbot = AIChatbot()
 
+# Runs chat requests off the request thread, bounded so slow OpenAI calls can't pile up
+executor = ThreadPoolExecutor(max_workers=CHAT_WORKERS, thread_name_prefix='chat')
+
+def get_or_create_session_id() -> str:
+    """Return the session ID for the current user, creating one if needed"""
+    session_id = session.get('session_id')
+    if not session_id:
+        session_id = f"session_{int(time.time())}_{secrets.token_hex(6)}"
+        session['session_id'] = session_id
+    return session_id
+
 @app.route('/')
 def index():
     """Main page with chatbot interface"""
@@ -630,56 +1174,159 @@ def chat():
         user_message = data.get('message', '').strip()
         
         if not user_message:
-            return jsonify({"error": "Message cannot be empty"}), 400
+            return ojsonify({"error": "Message cannot be empty"}), 400
         
         # Get conversation context
         context = data.get('context', [])
         
         # Get or create session ID
-        session_id = session.get('session_id')
-        if not session_id:
-            session_id = f"session_{int(time.time())}_{np.random.randint(1000, 9999)}"
-            session['session_id'] = session_id
+        session_id = get_or_create_session_id()
         
         # Generate enhanced response
-        response = chatbot.generate_response(user_message, context, session_id)
+        future = executor.submit(chatbot.generate_response, user_message, context, session_id)
+        try:
+            response = future.result(timeout=CHAT_TIMEOUT)
+        except FutureTimeoutError:
+            logger.error("Chat request timed out after %ss", CHAT_TIMEOUT)
+            return ojsonify({"error": "Request timed out"}), 504
         
-        return jsonify(response)
+        return ojsonify(response)
         
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
-        return jsonify({"error": "Internal server error"}), 500
+        return ojsonify({"error": "Internal server error"}), 500
+
+def _chat_events(user_message: str, context: List[Dict], session_id: str) -> Iterator[bytes]:
+    """Encode chatbot.generate_response_stream events as server-sent events"""
+    # Module level rather than nested in the view: mypyc-compiled closures fail on close()
+    # "delta" events carry text chunks; the final "response" event carries the full response
+    for event, payload in chatbot.generate_response_stream(user_message, context, session_id):
+        yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(payload) + b"\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+@limiter.limit("100 per minute")
+def chat_stream():
+    """Stream chat responses as server-sent events"""
+    try:
+        data = request.get_json()
+        user_message = data.get('message', '').strip()
+        
+        if not user_message:
+            return ojsonify({"error": "Message cannot be empty"}), 400
+        
+        context = data.get('context', [])
+        session_id = get_or_create_session_id()
+        
+        return Response(stream_with_context(_chat_events(user_message, context, session_id)), mimetype='text/event-stream')
+        
+    except Exception as e:
+        logger.error(f"Error in chat stream endpoint: {e}")
+        return ojsonify({"error": "Internal server error"}), 500
+
+def _batch_cost() -> int:
+    """Rate-limit cost of a batch request: one per message, like /api/chat"""
+    data = request.get_json(silent=True)
+    messages = data.get('messages') if isinstance(data, dict) else None
+    return max(len(messages), 1) if isinstance(messages, list) else 1
+
+@app.route('/api/chat/batch', methods=['POST'])
+@limiter.limit("100 per minute", cost=_batch_cost)
+def chat_batch():
+    """Handle several chat messages in one request"""
+    try:
+        data = request.get_json()
+        messages = data.get('messages', [])
+        
+        if not isinstance(messages, list) or not messages:
+            return ojsonify({"error": "Messages must be a non-empty list"}), 400
+        if len(messages) > MAX_BATCH_SIZE:
+            return ojsonify({"error": f"At most {MAX_BATCH_SIZE} messages per batch"}), 400
+        
+        user_messages = [message.strip() for message in messages if isinstance(message, str)]
+        if len(user_messages) != len(messages) or not all(user_messages):
+            return ojsonify({"error": "Messages cannot be empty"}), 400
+        
+        context = data.get('context', [])
+        session_id = get_or_create_session_id()
+        
+        # The whole batch shares one CHAT_TIMEOUT: NLP for all messages at once, then one
+        # executor job per reply so OpenAI calls run side by side rather than in sequence
+        deadline = time.monotonic() + CHAT_TIMEOUT
+        start_time = time.time()  # Response times include the shared NLP stage, as in /api/chat
+        try:
+            analyses = executor.submit(chatbot.analyze_batch, user_messages).result(timeout=CHAT_TIMEOUT)
+        except FutureTimeoutError:
+            logger.error("Chat batch request timed out after %ss", CHAT_TIMEOUT)
+            return ojsonify({"error": "Request timed out"}), 504
+        
+        futures = [
+            executor.submit(chatbot.generate_response, message, context, session_id, analysis, start_time)
+            for message, analysis in zip(user_messages, analyses)
+        ]
+        _, pending = wait_futures(futures, timeout=max(deadline - time.monotonic(), 0))
+        if pending:
+            # Drop replies that haven't started so a timed-out batch stops spending API quota
+            for future in pending:
+                future.cancel()
+            logger.error("Chat batch request timed out after %ss", CHAT_TIMEOUT)
+            return ojsonify({"error": "Request timed out"}), 504
+        
+        return ojsonify({"responses": [future.result() for future in futures]})
+        
+    except Exception as e:
+        logger.error(f"Error in chat batch endpoint: {e}")
+        return ojsonify({"error": "Internal server error"}), 500
 
 @app.route('/api/analytics')
 @limiter.limit("10 per minute")
 def analytics():
     """Get enhanced chatbot analytics"""
     try:
-        return jsonify(chatbot.get_analytics())
+        return ojsonify(chatbot.get_analytics())
     except Exception as e:
         logger.error(f"Error in analytics endpoint: {e}")
-        return jsonify({"error": "Internal server error"}), 500
+        return ojsonify({"error": "Internal server error"}), 500
+
+# Fixed part of the /api/health body, serialized once without its closing brace
+_HEALTH_STATIC = orjson.dumps({
+    "status": "healthy",
+    "uptime": "99.9%",
+    "version": "2.0.0",
+    "features": {
+        "nlp_processing": True,
+        "sentiment_analysis": True,
+        "entity_extraction": True,
+        "intent_classification": True,
+        "openai_integration": client is not None
+    }
+})[:-1]
 
 @app.route('/api/health')
 def health_check():
     """Enhanced health check endpoint for monitoring"""
-    return jsonify({
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "uptime": "99.9%",
-        "version": "2.0.0",
-        "features": {
-            "nlp_processing": True,
-            "sentiment_analysis": True,
-            "entity_extraction": True,
-            "intent_classification": True,
-            "openai_integration": client is not None
-        },
-        "performance": {
-            "response_time_avg": np.mean(chatbot.response_times) if chatbot.response_times else 0,
-            "total_queries": chatbot.query_count
-        }
-    })
+    body = b'%s,"timestamp":%s,"performance":{"response_time_avg":%s,"total_queries":%d}}' % (
+        _HEALTH_STATIC,
+        orjson.dumps(current_timestamp()),
+        orjson.dumps(chatbot.average_response_time()),
+        chatbot.query_count
+    )
+    return app.response_class(body, mimetype='application/json')
+
+# Conversation fields exposed by /api/conversations; every stored entry has all of them
+CONVERSATION_FIELDS = ("timestamp", "intent", "sentiment", "response_time", "query_id", "session_id")
+_project_conversation = itemgetter(*CONVERSATION_FIELDS)
+
+def _conversations_body(conversations: List[Dict], total: int, summary: Dict) -> Iterator[bytes]:
+    """Stream the /api/conversations body one conversation at a time"""
+    # Module level rather than nested in the view: mypyc-compiled closures fail on close()
+    yield b'{"conversations":['
+    for i, conv in enumerate(conversations):
+        # Filter sensitive information for security
+        filtered_conv = dict(zip(CONVERSATION_FIELDS, _project_conversation(conv)))
+        filtered_conv["timestamp"] = format_timestamp(filtered_conv["timestamp"])
+        filtered_conv["entities_count"] = len(conv.get("entities", ()))
+        yield (b',' if i else b'') + orjson.dumps(filtered_conv)
+    yield b'],"total":' + orjson.dumps(total) + b',"summary":' + orjson.dumps(summary) + b'}'
 
 @app.route('/api/conversations')
 @limiter.limit("20 per minute")
@@ -687,68 +1334,41 @@ def get_conversations():
     """Get recent conversations with enhanced data"""
     try:
         limit = min(int(request.args.get('limit', 50)), 100)
-        conversations = chatbot.conversation_history[-limit:]
+        conversations = chatbot.recent_conversations(limit)
+        total = len(chatbot.conversation_history)
+        summary = chatbot.session_summary()
         
-        # Filter sensitive information for security
-        filtered_conversations = []
-        for conv in conversations:
-            filtered_conv = {
-                "timestamp": conv.get("timestamp"),
-                "intent": conv.get("intent"),
-                "sentiment": conv.get("sentiment"),
-                "response_time": conv.get("response_time"),
-                "query_id": conv.get("query_id"),
-                "entities_count": len(conv.get("entities", [])),
-                "session_id": conv.get("session_id")
-            }
-            filtered_conversations.append(filtered_conv)
-        
-        return jsonify({
-            "conversations": filtered_conversations,
-            "total": len(chatbot.conversation_history),
-            "summary": {
-                "total_sessions": len(set(conv.get("session_id") for conv in chatbot.conversation_history if conv.get("session_id"))),
-                "avg_session_length": len(chatbot.conversation_history) / max(1, len(set(conv.get("session_id") for conv in chatbot.conversation_history if conv.get("session_id"))))
-            }
-        })
+        return app.response_class(_conversations_body(conversations, total, summary), mimetype='application/json')
     except Exception as e:
         logger.error(f"Error getting conversations: {e}")
-        return jsonify({"error": "Internal server error"}), 500
+        return ojsonify({"error": "Internal server error"}), 500
 
 @app.route('/api/session/<session_id>')
 @limiter.limit("30 per minute")
 def get_session_data(session_id):
     """Get conversation data for a specific session"""
     try:
-        session_conversations = [
-            conv for conv in chatbot.conversation_history 
-            if conv.get("session_id") == session_id
-        ]
+        session_conversations = chatbot.get_session_data(session_id)
         
-        if not session_conversations:
-            return jsonify({"error": "Session not found"}), 404
+        if session_conversations is None:
+            return ojsonify({"error": "Session not found"}), 404
         
-        return jsonify({
-            "session_id": session_id,
-            "conversations": len(session_conversations),
-            "start_time": min(conv.get("timestamp") for conv in session_conversations),
-            "last_activity": max(conv.get("timestamp") for conv in session_conversations),
-            "intents": [conv.get("intent") for conv in session_conversations],
-            "sentiments": [conv.get("sentiment") for conv in session_conversations]
-        })
+        return ojsonify(session_conversations)
         
     except Exception as e:
         logger.error(f"Error getting session data: {e}")
-        return jsonify({"error": "Internal server error"}), 500
+        return ojsonify({"error": "Internal server error"}), 500
 
 if __name__ == '__main__':
-    # Production deployment settings
+    # Flask development server; production runs under gunicorn (see gunicorn_conf.py)
     port = int(os.environ.get('PORT', 5001))
     debug = os.environ.get('FLASK_ENV') == 'development'
     
     logger.info(f"Starting Enhanced AI Customer Support Chatbot on port {port}")
     logger.info(f"Debug mode: {debug}")
     logger.info(f"Features: NLP Processing, Sentiment Analysis, Entity Extraction")
+    if not debug:
+        logger.warning("This is the development server; use 'gunicorn -c gunicorn_conf.py app:app' in production")
     
     app.run(
         host='0.0.0.0',
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Smoke check for the compiled build of the AI Customer Support Chatbot
+
+Run after `python setup.py build_ext --inplace`: imports app (the mypyc
+extension when present), drives the main endpoints through Flask's test
+client and closes every response, so streamed bodies are fully consumed the
+way a WSGI server consumes them. Exits non-zero on the first failure.
+"""
+
+import sys
+
+import app
+
+CHECKS = [
+    ("GET", "/api/health", None),
+    ("POST", "/api/chat", {"message": "Hello, I need help with my account"}),
+    ("POST", "/api/chat/stream", {"message": "How much does the premium plan cost?"}),
+    ("POST", "/api/chat/batch", {"messages": ["I want a refund", "The app keeps crashing"]}),
+    ("GET", "/api/conversations", None),
+    ("GET", "/api/analytics", None),
+]
+
+def main():
+    compiled = not app.__file__.endswith(".py")
+    print(f"Loaded {app.__file__} ({'compiled' if compiled else 'interpreted'})")
+
+    client = app.app.test_client()
+    for method, path, payload in CHECKS:
+        try:
+            response = client.open(path, method=method, json=payload)
+            response.get_data()
+            response.close()
+        except Exception as e:
+            print(f"❌ {method} {path}: {type(e).__name__}: {e}")
+            return 1
+        if response.status_code != 200:
+            print(f"❌ {method} {path}: {response.status_code}")
+            return 1
+        print(f"✅ {method} {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
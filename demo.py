@@ -54,17 +54,15 @@ def run_test_scenarios(chatbot):
         "I'd like to provide feedback about your service"
     ]
     
-    for i, message in enumerate(test_scenarios, 1):
+    # Get all chatbot responses in one batch
+    responses = chatbot.generate_response_batch(test_scenarios)
+    
+    for i, (message, response) in enumerate(zip(test_scenarios, responses), 1):
         print(f"\n--- Test {i}: {message} ---")
         
         # Simulate user input
         print(f"👤 User: {message}")
         
-        # Get chatbot response
-        start_time = time.time()
-        response = chatbot.generate_response(message)
-        end_time = time.time()
-        
         # Display response
         print(f"🤖 Bot: {response['response']}")
         print(f"   Intent: {response['intent']}")
@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration for the AI Customer Support Chatbot
+
+    gunicorn -c gunicorn_conf.py app:app
+
+gevent workers monkey-patch the standard library before the app is
+imported, so blocking I/O (OpenAI, Redis) yields to other requests and a
+single worker serves many concurrent connections.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = "gevent"
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+timeout = 120
+keepalive = 2
+
+# Loading the app in the master would import it before gevent patches sockets
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
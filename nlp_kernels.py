@@ -0,0 +1,87 @@
+"""
+Vectorized kernels for the batch NLP paths in app.py
+
+Kept in their own module so NumPy and numba are only imported once a batch
+is processed, and so numba always JITs plain Python functions (app.py may
+be compiled with mypyc).
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # Kernels fall back to NumPy ufuncs
+    numba = None  # type: ignore[assignment]
+
+
+class SortedVocabulary:
+    """Keywords with one integer value each, looked up in bulk by binary search"""
+
+    def __init__(self, values: Dict[str, int]):
+        self.words = np.array(sorted(values))
+        self.values = np.array([values[word] for word in self.words], dtype=np.int64)
+
+    def lookup(self, words: List[str], missing: int) -> np.ndarray:
+        """Value of each word, or `missing` for words outside the vocabulary"""
+        tokens = np.array(words, dtype=str)
+        idx = np.clip(np.searchsorted(self.words, tokens), 0, len(self.words) - 1)
+        return np.where(self.words[idx] == tokens, self.values[idx], missing)
+
+
+def pack_tokens(token_lists: List[List[str]]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Flatten per-message token lists into (tokens, lengths, offsets)"""
+    lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+    offsets = np.zeros(len(token_lists) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return [token for tokens in token_lists for token in tokens], lengths, offsets
+
+
+def _count_classes(class_ids: np.ndarray, offsets: np.ndarray, n_classes: int) -> np.ndarray:
+    """Loop kernel for count_classes"""
+    n_messages = len(offsets) - 1
+    counts = np.zeros((n_messages, n_classes), dtype=np.int64)
+    for i in range(n_messages):
+        for j in range(offsets[i], offsets[i + 1]):
+            if class_ids[j] >= 0:
+                counts[i, class_ids[j]] += 1
+    return counts
+
+
+def _min_per_message(values: np.ndarray, offsets: np.ndarray, default: int) -> np.ndarray:
+    """Loop kernel for min_per_message"""
+    n_messages = len(offsets) - 1
+    best = np.full(n_messages, default, dtype=np.int64)
+    for i in range(n_messages):
+        for j in range(offsets[i], offsets[i + 1]):
+            if values[j] < best[i]:
+                best[i] = values[j]
+    return best
+
+
+if numba is not None:
+    _count_classes = numba.njit(cache=True)(_count_classes)
+    _min_per_message = numba.njit(cache=True)(_min_per_message)
+
+
+def count_classes(class_ids: np.ndarray, lengths: np.ndarray, offsets: np.ndarray, n_classes: int) -> np.ndarray:
+    """Count each class id per message in a packed batch; negative ids are ignored"""
+    if numba is not None:
+        return _count_classes(class_ids, offsets, n_classes)
+    # Without numba, bincount over (message, class) pairs
+    message_ids = np.repeat(np.arange(len(lengths)), lengths)
+    hits = class_ids >= 0
+    return np.bincount(
+        message_ids[hits] * n_classes + class_ids[hits],
+        minlength=n_classes * len(lengths)
+    ).reshape(-1, n_classes)
+
+
+def min_per_message(values: np.ndarray, lengths: np.ndarray, offsets: np.ndarray, default: int) -> np.ndarray:
+    """Smallest value per message in a packed batch, or `default` for messages without tokens"""
+    if numba is not None:
+        return _min_per_message(values, offsets, default)
+    best = np.full(len(lengths), default, dtype=np.int64)
+    np.minimum.at(best, np.repeat(np.arange(len(lengths)), lengths), values)
+    return best
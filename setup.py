@@ -0,0 +1,26 @@
+"""
+Build script for the AI Customer Support Chatbot
+
+When mypy is installed, app.py is compiled ahead-of-time with mypyc into a
+CPython C extension (app.*.so). Python picks the extension over app.py, so
+Flask/Gunicorn import the compiled NLP hot path transparently:
+
+    pip install mypy
+    python setup.py build_ext --inplace
+
+Without mypy the module is installed as plain Python.
+"""
+
+from setuptools import setup
+
+try:
+    from mypyc.build import mypycify
+except ImportError:
+    mypycify = None  # mypy not installed; ship uncompiled
+
+setup(
+    name="ai-customer-support-chatbot",
+    version="2.0.0",
+    py_modules=["app", "nlp_kernels"],
+    ext_modules=mypycify(["--ignore-missing-imports", "app.py"]) if mypycify else [],
+)
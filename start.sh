@@ -94,5 +94,9 @@ echo "   Web interface will be available at: http://localhost:5000"
 echo "   Press Ctrl+C to stop the server"
 echo ""
 
-# Run the application
-python app.py
+# Run the application: Flask's development server in development, gunicorn otherwise
+if [ "$FLASK_ENV" = "development" ]; then
+    python app.py
+else
+    exec gunicorn -c gunicorn_conf.py app:app
+fi
@@ -4,13 +4,22 @@ Test script for AI Customer Support Chatbot
 Demonstrates functionality and tests API endpoints
 """
 
+import asyncio
+import functools
+import io
 import requests
 import json
 import time
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 
 # Configuration
 BASE_URL = "http://localhost:5000"
+
+# One keep-alive connection pool for all requests, so timings measure the server
+# rather than per-request TCP setup
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
 TEST_MESSAGES = [
     "Hello, I need help with my account",
     "I'm experiencing a technical issue with the app",
@@ -26,7 +35,7 @@ def test_health_check():
     """Test the health check endpoint"""
     print("🔍 Testing Health Check...")
     try:
-        response = requests.get(f"{BASE_URL}/api/health")
+        response = SESSION.get(f"{BASE_URL}/api/health")
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Health Check: {data['status']} | Uptime: {data['uptime']}")
@@ -38,24 +47,24 @@ def test_health_check():
         print(f"❌ Health Check error: {e}")
         return False
 
-def test_analytics():
+def test_analytics(session=SESSION, log=print):
     """Test the analytics endpoint"""
-    print("\n📊 Testing Analytics...")
+    log("\n📊 Testing Analytics...")
     try:
-        response = requests.get(f"{BASE_URL}/api/analytics")
+        response = session.get(f"{BASE_URL}/api/analytics")
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Analytics retrieved successfully")
-            print(f"   Total Queries: {data.get('total_queries', 'N/A')}")
-            print(f"   Avg Response Time: {data.get('average_response_time', 'N/A')}")
-            print(f"   Performance Gain: {data.get('response_time_reduction', 'N/A')}")
-            print(f"   Uptime: {data.get('uptime_percentage', 'N/A')}")
+            log(f"✅ Analytics retrieved successfully")
+            log(f"   Total Queries: {data.get('total_queries', 'N/A')}")
+            log(f"   Avg Response Time: {data.get('average_response_time', 'N/A')}")
+            log(f"   Performance Gain: {data.get('response_time_reduction', 'N/A')}")
+            log(f"   Uptime: {data.get('uptime_percentage', 'N/A')}")
             return True
         else:
-            print(f"❌ Analytics failed: {response.status_code}")
+            log(f"❌ Analytics failed: {response.status_code}")
             return False
     except Exception as e:
-        print(f"❌ Analytics error: {e}")
+        log(f"❌ Analytics error: {e}")
         return False
 
 def test_chat_endpoint(message, context=None):
@@ -67,7 +76,7 @@ def test_chat_endpoint(message, context=None):
         }
         
         start_time = time.time()
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/api/chat",
             json=payload,
             headers={"Content-Type": "application/json"}
@@ -121,8 +130,36 @@ def test_conversation_flow():
             # Keep only last 6 messages in context (3 exchanges)
             if len(conversation_context) > 6:
                 conversation_context = conversation_context[-6:]
-        
-        time.sleep(1)  # Small delay between requests
+
+# Inflected forms must classify like their base keyword
+INFLECTED_MESSAGES = [
+    ("What are your prices?", "billing"),
+    ("I was billed twice", "billing"),
+    ("the invoices are wrong", "billing"),
+    ("refunds take long", "return_refund"),
+    ("the app crashes on start", "technical_support"),
+    ("I have some complaints", "complaint"),
+    ("My suggestions", "feedback"),
+    ("My reviews", "feedback"),
+]
+
+def test_intent_inflections():
+    """Test that plural and past-tense keywords keep their intent"""
+    print("\n🔤 Testing Inflected Keywords...")
+    
+    failures = 0
+    for message, expected in INFLECTED_MESSAGES:
+        try:
+            response = SESSION.post(f"{BASE_URL}/api/chat", json={"message": message, "context": []})
+            intent = response.json().get('intent') if response.status_code == 200 else None
+        except Exception as e:
+            intent = f"error: {e}"
+        if intent == expected:
+            print(f"   ✅ '{message}' -> {intent}")
+        else:
+            print(f"   ❌ '{message}' -> {intent} (expected {expected})")
+            failures += 1
+    return failures == 0
 
 def test_rate_limiting():
     """Test rate limiting by sending multiple rapid requests"""
@@ -135,92 +172,84 @@ def test_rate_limiting():
         if response is None:
             print(f"   Rate limit hit after {i+1} rapid requests")
             break
-        time.sleep(0.1)  # Very small delay
 
-def test_error_handling():
+def test_error_handling(session=SESSION, log=print):
     """Test error handling with invalid requests"""
-    print("\n🚨 Testing Error Handling...")
+    log("\n🚨 Testing Error Handling...")
     
     # Test empty message
-    print("   Testing empty message...")
-    response = requests.post(
+    log("   Testing empty message...")
+    response = session.post(
         f"{BASE_URL}/api/chat",
         json={"message": "", "context": []},
         headers={"Content-Type": "application/json"}
     )
     if response.status_code == 400:
-        print("   ✅ Empty message properly rejected")
+        log("   ✅ Empty message properly rejected")
     else:
-        print(f"   ❌ Empty message not rejected: {response.status_code}")
+        log(f"   ❌ Empty message not rejected: {response.status_code}")
     
     # Test missing message field
-    print("   Testing missing message field...")
-    response = requests.post(
+    log("   Testing missing message field...")
+    response = session.post(
         f"{BASE_URL}/api/chat",
         json={"context": []},
         headers={"Content-Type": "application/json"}
     )
     if response.status_code == 400:
-        print("   ✅ Missing message field properly rejected")
+        log("   ✅ Missing message field properly rejected")
     else:
-        print(f"   ❌ Missing message field not rejected: {response.status_code}")
+        log(f"   ❌ Missing message field not rejected: {response.status_code}")
     
     # Test invalid JSON
-    print("   Testing invalid JSON...")
-    response = requests.post(
+    log("   Testing invalid JSON...")
+    response = session.post(
         f"{BASE_URL}/api/chat",
         data="invalid json",
         headers={"Content-Type": "application/json"}
     )
     if response.status_code == 400:
-        print("   ✅ Invalid JSON properly rejected")
+        log("   ✅ Invalid JSON properly rejected")
     else:
-        print(f"   ❌ Invalid JSON not rejected: {response.status_code}")
+        log(f"   ❌ Invalid JSON not rejected: {response.status_code}")
 
 def run_performance_test():
     """Run a performance test with multiple concurrent requests"""
     print("\n🚀 Running Performance Test...")
     
-    import concurrent.futures
-    import threading
+    import httpx
     
-    results = []
-    lock = threading.Lock()
-    
-    def send_request(message):
-        start_time = time.time()
+    async def send_request(client, message):
+        start_time = time.perf_counter()
         try:
-            response = requests.post(
+            response = await client.post(
                 f"{BASE_URL}/api/chat",
                 json={"message": message, "context": []},
                 headers={"Content-Type": "application/json"},
                 timeout=30
             )
-            end_time = time.time()
-            
-            with lock:
-                results.append({
-                    "message": message,
-                    "response_time": end_time - start_time,
-                    "status_code": response.status_code,
-                    "success": response.status_code == 200
-                })
-                
+            return {
+                "message": message,
+                "response_time": time.perf_counter() - start_time,
+                "status_code": response.status_code,
+                "success": response.status_code == 200
+            }
         except Exception as e:
-            with lock:
-                results.append({
-                    "message": message,
-                    "response_time": 0,
-                    "status_code": 0,
-                    "success": False,
-                    "error": str(e)
-                })
+            return {
+                "message": message,
+                "response_time": 0,
+                "status_code": 0,
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def send_all(messages):
+        async with httpx.AsyncClient() as client:
+            return await asyncio.gather(*(send_request(client, message) for message in messages))
     
     # Send 5 concurrent requests
     test_messages = [f"Performance test message {i}" for i in range(5)]
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        executor.map(send_request, test_messages)
+    results = asyncio.run(send_all(test_messages))
     
     # Analyze results
     successful_requests = [r for r in results if r['success']]
@@ -238,6 +267,20 @@ def run_performance_test():
         for req in failed_requests:
             print(f"      - {req.get('error', 'Unknown error')}")
 
+async def run_independent_tests():
+    """Run the stateless checks concurrently, each on its own HTTP session"""
+    checks = [test_analytics, test_error_handling]
+    outputs = [io.StringIO() for _ in checks]
+    
+    def run_check(check, output):
+        with requests.Session() as session:
+            check(session, functools.partial(print, file=output))
+    
+    await asyncio.gather(*(asyncio.to_thread(run_check, check, output) for check, output in zip(checks, outputs)))
+    # Print each check's output in one piece rather than interleaved
+    for output in outputs:
+        print(output.getvalue(), end="")
+
 def main():
     """Main test function"""
     print("🤖 AI Customer Support Chatbot - Test Suite")
@@ -253,10 +296,11 @@ def main():
         return
     
     # Run tests
-    test_analytics()
+    asyncio.run(run_independent_tests())
     test_conversation_flow()
+    test_intent_inflections()
     test_rate_limiting()
-    test_error_handling()
+    # On its own, so its timings reflect the server rather than the other tests
     run_performance_test()
     
     # Final analytics check